@@ -0,0 +1,29 @@
+'''
+    helpers to load large amounts of rows through PostgreSQL COPY, used by the seeding and benchmark commands
+'''
+import csv
+import io
+from typing import Iterable, List, Sequence
+from django.db import connection
+
+
+def reserve_ids(model, count: int) -> List[int]:
+    ''' takes count ids from the table's sequence so rows can be copied together with their foreign keys '''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_rows(model, columns: Sequence[str], rows: Iterable[Sequence]) -> None:
+    ''' None values are written as NULL. pass amounts as int cents, str() of a Money is its decimal string '''
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
@@ -0,0 +1,131 @@
+'''
+    versioned cache of list responses. a cached response is keyed on the request and on the current
+    version of every entity it was built from. league.services bump those versions on writes, so an
+    outdated response is never read again and simply expires. responses carry an ETag of their content,
+    a cached response the client already holds is answered with 304 without touching the database
+'''
+import hashlib
+import json
+import time
+from typing import Callable, Iterable, List
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from onlinesoccermanager.etags import etag_matches, make_etag, not_modified_response
+
+TEAMS = 'teams'
+PLAYERS = 'players'
+TRANSFERS = 'transfers'
+
+CACHED_HEADERS = ('Link',)
+# a worker rebuilding a response holds its lock at most this long
+REBUILD_LOCK_SECONDS = 10
+
+
+def version_cache_key(entity: str) -> str:
+    return f'league:version:{entity}'
+
+
+def versions_get(entities: Iterable[str]) -> List[int]:
+    keys = [version_cache_key(entity) for entity in entities]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        # an evicted counter restarts from the clock, never from a version older responses were stored under
+        cache.add(key, time.time_ns(), timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def versions_bump(*entities: str) -> None:
+    '''
+        bumps now and once more on commit. a response rebuilt from the old rows in between
+        is stored under the first bump and dropped by the second
+    '''
+    def bump():
+        for entity in entities:
+            try:
+                cache.incr(version_cache_key(entity))
+            except ValueError:
+                cache.add(version_cache_key(entity), time.time_ns(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def content_etag(data, headers: dict) -> str:
+    return make_etag(json.dumps(data, cls=JSONEncoder), sorted(headers.items()))
+
+
+class VersionedResponseCacheMixin:
+    ''' list views set cache_entities to the entities their responses are built from '''
+    cache_entities = ()
+
+    def get_response_cache_key(self, request) -> str:
+        params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+        # links in the response are absolute, so the host is part of the key
+        digest = hashlib.sha1(repr((request.get_host(), request.path, params)).encode()).hexdigest()
+        versions = '.'.join(str(version) for version in versions_get(self.cache_entities))
+        return f'league:response:{digest}:{versions}'
+
+    def get_list_response(self, request, queryset, projection) -> Response:
+        '''
+            the cached page, or whole list, of the queryset rendered through a ValuesProjection.
+            views mix in a paginator such as LinkHeaderPagination alongside
+        '''
+        def build_response() -> Response:
+            rows = projection.values(queryset)
+            page = self.paginate_queryset(rows, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(projection.render(page))
+            return Response(projection.render(rows), status=status.HTTP_200_OK)
+        return self.get_cached_response(request, build_response)
+
+    def get_cached_response(self, request, build_response: Callable[[], Response]) -> Response:
+        '''
+            returns the cached response or builds it. on concurrent misses of one key only the worker
+            holding the rebuild lock stores its response. the others query the database right away rather
+            than wait, under daphne every sync view of a process shares one thread and a wait stalls them all
+        '''
+        timeout = settings.RESPONSE_CACHE_SECONDS
+        if not timeout:
+            response = build_response()
+            if response.status_code == 200:
+                self.tag_response(response)
+            return self.get_conditional_response(request, response)
+
+        key = self.get_response_cache_key(request)
+        lock_key = f'{key}:lock'
+        cached = cache.get(key)
+        locked = False
+        if cached is None:
+            locked = cache.add(lock_key, 1, REBUILD_LOCK_SECONDS)
+        if cached is not None:
+            data, headers = cached
+            return self.get_conditional_response(request, Response(data, headers=headers))
+
+        try:
+            response = build_response()
+            if response.status_code == 200:
+                headers = self.tag_response(response)
+                if locked:
+                    cache.set(key, (response.data, headers), timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return self.get_conditional_response(request, response)
+
+    def tag_response(self, response: Response) -> dict:
+        ''' sets the ETag of a built response, returns the headers to cache along with its data '''
+        headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+        headers['ETag'] = response['ETag'] = content_etag(response.data, headers)
+        return headers
+
+    def get_conditional_response(self, request, response: Response) -> Response:
+        if response.has_header('ETag') and etag_matches(request, response['ETag']):
+            return not_modified_response(response['ETag'])
+        return response
@@ -12,3 +12,8 @@ class PlayerPosition(models.TextChoices):
 class TransferStatus(models.TextChoices):
     PENDING = "pending", _("Pending")
     COMPLETE = "complete", _("Complete")
+
+
+class StatsGranularity(models.TextChoices):
+    HOUR = "hour", _("Hour")
+    DAY = "day", _("Day")
@@ -0,0 +1,55 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework.exceptions import AuthenticationFailed
+from league.constants import PlayerPosition
+from league.events import market_group
+from users.authentication import CustomJWTAuthentication
+
+# websocket close codes, the 4000 range is free for applications
+CLOSE_UNAUTHENTICATED = 4001
+CLOSE_INVALID_FILTER = 4002
+
+
+class MarketConsumer(AsyncJsonWebsocketConsumer):
+    '''
+        pushes transfer.created and transfer.completed events of the transfer market.
+        connect with ?token=<jwt> and optionally &position=<position> and/or &seller=<team_id>
+    '''
+    group_name = None
+
+    async def connect(self):
+        query = {key: values[-1] for key, values in parse_qs(self.scope['query_string'].decode()).items()}
+        try:
+            await database_sync_to_async(CustomJWTAuthentication().authenticate_token)(query.get('token', ''))
+        except AuthenticationFailed:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+
+        self.position = query.get('position')
+        self.seller = query.get('seller')
+        if self.position is not None and self.position not in PlayerPosition.values:
+            await self.close(code=CLOSE_INVALID_FILTER)
+            return
+        if self.seller is not None:
+            if not self.seller.isdigit():
+                await self.close(code=CLOSE_INVALID_FILTER)
+                return
+            self.seller = int(self.seller)
+
+        self.group_name = market_group(self.position, self.seller)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def transfer_event(self, message):
+        transfer = message['transfer']
+        # a subscriber sits in the group of its narrowest filter, the other filter is applied here
+        if self.position is not None and transfer['position'] != self.position:
+            return
+        if self.seller is not None and transfer['seller'] != self.seller:
+            return
+        await self.send_json({'event': message['event'], 'transfer': transfer})
@@ -0,0 +1,62 @@
+'''
+    transfer market events pushed to websocket subscribers, see league.consumers.MarketConsumer.
+    events travel over the channel layer, a Redis pub/sub backplane shared by every ASGI worker
+'''
+import logging
+from typing import Optional
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from rest_framework import serializers
+from league.models import Transfer
+from onlinesoccermanager.money import MoneySerializerField
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_CREATED = 'transfer.created'
+TRANSFER_COMPLETED = 'transfer.completed'
+
+
+class TransferEventSerializer(serializers.Serializer):
+    # the fields of a /market/ listing, plus the buyer once the transfer completes
+    player = serializers.IntegerField(source='player.id')
+    first_name = serializers.CharField(source='player.first_name')
+    last_name = serializers.CharField(source='player.last_name')
+    position = serializers.CharField(source='player.position')
+    seller = serializers.IntegerField(source='seller.id')
+    seller_name = serializers.CharField(source='seller.name')
+    buyer = serializers.IntegerField(source='buyer.id', allow_null=True, default=None)
+    price = MoneySerializerField()
+    status = serializers.CharField()
+
+
+def market_group(position: Optional[str] = None, seller: Optional[int] = None) -> str:
+    ''' the narrowest group carrying every event a subscriber with these filters wants '''
+    if seller is not None:
+        return f'market.seller.{seller}'
+    if position is not None:
+        return f'market.position.{position}'
+    return 'market'
+
+
+def transfer_event_publish(event: str, transfer: Transfer) -> None:
+    ''' sent once the current transaction commits, subscribers never hear of a rolled back transfer '''
+    message = {'type': 'transfer.event', 'event': event, 'transfer': dict(TransferEventSerializer(transfer).data)}
+    groups = [
+        market_group(),
+        market_group(position=transfer.player.position),
+        market_group(seller=transfer.seller.id),
+    ]
+
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            for group in groups:
+                async_to_sync(channel_layer.group_send)(group, message)
+        except Exception:
+            # the transfer is already committed, a push outage only costs subscribers this event
+            logger.exception('could not publish %s for player %s', event, message['transfer']['player'])
+
+    transaction.on_commit(send)
@@ -0,0 +1,100 @@
+'''
+    whole table exports as CSV or NDJSON, streamed by the export endpoints and the export_league command.
+    rows are read one chunk at a time by keyset queries on id and written out as they come, so memory stays
+    flat whatever the size of the table. no cursor stays open between chunks, which lets daphne serve other
+    requests on the same connection while an export is sent
+'''
+import csv
+import io
+from typing import Iterator, NamedTuple, Tuple
+import orjson
+from django.conf import settings
+from django.db import models
+from rest_framework.exceptions import ValidationError
+from league.filters import TeamFilter, PlayerFilter, TransferFilter
+from league.models import Team, Player, Transfer
+from onlinesoccermanager.money import MoneyField
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+CONTENT_TYPES = {CSV: 'text/csv; charset=utf-8', NDJSON: 'application/x-ndjson'}
+
+
+class Export(NamedTuple):
+    model: type
+    filterset_class: type
+    # (column name, lookup) pairs, in the order they are written
+    columns: Tuple[Tuple[str, str], ...]
+
+
+# every export's first column is its id, chunks are read in id order from there
+EXPORTS = {
+    'players': Export(Player, PlayerFilter, (
+        ('id', 'id'), ('first_name', 'first_name'), ('last_name', 'last_name'), ('position', 'position'),
+        ('age', 'age'), ('country', 'country'), ('team', 'team_id'), ('value', 'value'),
+        ('updated_at', 'updated_at'),
+    )),
+    'teams': Export(Team, TeamFilter, (
+        ('id', 'id'), ('name', 'name'), ('country', 'country'), ('owner', 'owner_id'), ('budget', 'budget'),
+        ('value', 'value'), ('updated_at', 'updated_at'),
+    )),
+    'transfers': Export(Transfer, TransferFilter, (
+        ('id', 'id'), ('player', 'player_id'), ('seller', 'seller_id'), ('buyer', 'buyer_id'), ('price', 'price'),
+        ('status', 'status'), ('updated_at', 'updated_at'),
+    )),
+}
+
+
+def export_queryset(name: str, filters):
+    ''' the rows of an export as value tuples, filtered with the filterset of its list endpoint '''
+    export = EXPORTS[name]
+    filterset = export.filterset_class(filters, export.model.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset.qs.order_by('id').values_list(*(lookup for _, lookup in export.columns))
+
+
+def export_chunks(queryset, chunk_size: int) -> Iterator[list]:
+    ''' the rows of export_queryset a chunk at a time, each chunk read by its own query '''
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        chunk = list(queryset.filter(id__gt=chunk[-1][0])[:chunk_size])
+
+
+def get_converters(name: str):
+    ''' money is written as the decimal strings of the API and times as ISO 8601, like the JSON responses '''
+    model = EXPORTS[name].model
+    converters = []
+    for index, (_, lookup) in enumerate(EXPORTS[name].columns):
+        field = model._meta.get_field(lookup)
+        if isinstance(field, MoneyField):
+            converters.append((index, str))
+        elif isinstance(field, models.DateTimeField):
+            converters.append((index, lambda value: value.isoformat()))
+    return converters
+
+
+def export_stream(name: str, queryset, file_format: str, chunk_size: int = None) -> Iterator[bytes]:
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    columns = [column for column, _ in EXPORTS[name].columns]
+    converters = get_converters(name)
+    if file_format == CSV:
+        yield ','.join(columns).encode() + b'\r\n'
+
+    for chunk in export_chunks(queryset, chunk_size):
+        if converters:
+            chunk = [list(row) for row in chunk]
+            for row in chunk:
+                for index, convert in converters:
+                    if row[index] is not None:
+                        row[index] = convert(row[index])
+        if file_format == CSV:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(chunk)
+            yield buffer.getvalue().encode()
+        else:
+            yield b''.join(orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_APPEND_NEWLINE) for row in chunk)
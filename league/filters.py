@@ -1,5 +1,11 @@
 from django_filters import rest_framework as filters
 from league.models import Team, Player, Transfer
+from onlinesoccermanager.money import MoneyFormField
+
+
+class MoneyFilter(filters.NumberFilter):
+    ''' takes amounts in currency units like the API and compares them in cents '''
+    field_class = MoneyFormField
 
 
 class TeamFilter(filters.FilterSet):
@@ -9,9 +15,14 @@ class TeamFilter(filters.FilterSet):
 
 
 class PlayerFilter(filters.FilterSet):
+    min_age = filters.NumberFilter(field_name='age', lookup_expr='gte')
+    max_age = filters.NumberFilter(field_name='age', lookup_expr='lte')
+    min_value = MoneyFilter(field_name='value', lookup_expr='gte')
+    max_value = MoneyFilter(field_name='value', lookup_expr='lte')
+
     class Meta:
         model = Player
-        fields = ('position', 'team', 'country')
+        fields = ('position', 'team', 'country', 'min_age', 'max_age', 'min_value', 'max_value')
 
 
 class TransferFilter(filters.FilterSet):
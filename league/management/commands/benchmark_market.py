@@ -0,0 +1,112 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from league.bulk import copy_rows, reserve_ids
+from league.constants import PlayerPosition, TransferStatus
+from league.models import Team, Player, Transfer
+from league.selectors import active_transfers_list, transfer_retrieve_by_player_id
+from onlinesoccermanager.money import CENTS
+
+
+class Command(BaseCommand):
+    help = (
+        'Load completed transfers as market history and time the queries behind /market/. '
+        'run seed_league with --transfers first, needs a PostgreSQL database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history', type=int, default=1000000, help='completed transfers to load before timing')
+        parser.add_argument('--batch-size', type=int, default=100000, help='transfers written per COPY batch')
+        parser.add_argument('--repeat', type=int, default=50, help='times each query is run')
+        parser.add_argument('--page-size', type=int, default=25)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--explain', action='store_true', help='print the query plan of every market query')
+        parser.add_argument('--keep', action='store_true', help='keep the loaded history instead of deleting it')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_market loads data with COPY and needs a PostgreSQL database')
+        pending = Transfer.objects.filter(status=TransferStatus.PENDING)
+        if not pending.exists():
+            raise CommandError('no pending transfers to benchmark, run seed_league with --transfers first')
+        self.rng = random.Random(options['seed'])
+
+        history_ids = []
+        if options['history']:
+            history_ids = self.load_history(options['history'], options['batch_size'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Transfer._meta.db_table}')
+        self.stdout.write(
+            f'{pending.count()} pending and {Transfer.objects.filter(status=TransferStatus.COMPLETE).count()} '
+            f'completed transfers'
+        )
+
+        try:
+            self.run_queries(pending, options)
+        finally:
+            if history_ids and not options['keep']:
+                for first_id, last_id in history_ids:
+                    Transfer.objects.filter(id__range=(first_id, last_id)).delete()
+
+    def load_history(self, size, batch_size):
+        ''' returns the (first, last) id range of each loaded batch '''
+        team_ids = list(Team.objects.values_list('id', flat=True))
+        player_ids = list(Player.objects.values_list('id', flat=True))
+        if len(team_ids) < 2:
+            raise CommandError('the history needs at least two teams to trade between')
+
+        rng = self.rng
+        id_ranges = []
+        now = timezone.now().isoformat()
+        started = time.monotonic()
+        for offset in range(0, size, batch_size):
+            ids = reserve_ids(Transfer, min(batch_size, size - offset))
+            with transaction.atomic():
+                copy_rows(
+                    Transfer,
+                    ('id', 'seller_id', 'buyer_id', 'player_id', 'price', 'status', 'updated_at'),
+                    (
+                        (transfer_id, *rng.sample(team_ids, 2), rng.choice(player_ids), rng.randint(100000, 3000000) * CENTS,
+                         TransferStatus.COMPLETE, now)
+                        for transfer_id in ids
+                    )
+                )
+            id_ranges.append((ids[0], ids[-1]))
+            self.stdout.write(f'{offset + len(ids)}/{size} historical transfers loaded')
+        self.stdout.write(f'loaded {size} historical transfers in {time.monotonic() - started:.1f}s')
+        return id_ranges
+
+    def run_queries(self, pending, options):
+        page_size = options['page_size']
+        seller_id = pending.values_list('seller', flat=True).first()
+        player_id = pending.values_list('player', flat=True).first()
+        queries = [
+            ('market', {}),
+            ('market sorted by price', {'sort_by': 'price'}),
+            ('market sorted by -price', {'sort_by': '-price'}),
+            ('market filtered by seller', {'seller': seller_id}),
+            ('market filtered by position', {'position': PlayerPosition.ATTACKER}),
+            ('market filtered by position sorted by price', {'position': PlayerPosition.ATTACKER, 'sort_by': 'price'}),
+        ]
+        for name, filters in queries:
+            if options['explain']:
+                self.stdout.write(f'{name}:\n{active_transfers_list(dict(filters))[:page_size].explain()}')
+            # what a page costs the list view: the count and the page itself
+            self.report(name, options['repeat'], lambda: (
+                active_transfers_list(dict(filters)).count(),
+                list(active_transfers_list(dict(filters))[:page_size]),
+            ))
+        self.report('market retrieve by player', options['repeat'], lambda: transfer_retrieve_by_player_id(player_id))
+
+    def report(self, name, repeat, query):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(f'{name:<48} p50 {statistics.median(timings):8.2f}ms  p95 {p95:8.2f}ms')
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from rest_framework.exceptions import APIException
+from league.constants import TransferStatus
+from league.models import Team, Player, Transfer
+from league.services import generate_team_with_players, player_buy
+from onlinesoccermanager.money import CENTS
+
+User = get_user_model()
+
+EMAIL_PREFIX = 'buy-benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire many concurrent buyers at a small, hot transfer market and report purchase throughput '
+        'and whether money, players and team values stayed consistent. needs a PostgreSQL database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=50, help='number of buying teams')
+        parser.add_argument('--sellers', type=int, default=5, help='number of selling teams')
+        parser.add_argument('--transfers', type=int, default=50, help='players listed on the market')
+        parser.add_argument('--workers', type=int, default=16, help='concurrent threads, each with its own connection')
+        parser.add_argument('--attempts', type=int, default=500, help='total buy attempts')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='keep the benchmark teams instead of deleting them')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_player_buy needs PostgreSQL row locks')
+        if User.objects.filter(email__startswith=EMAIL_PREFIX).exists():
+            raise CommandError('leftover benchmark users found, delete users whose email starts with buy-benchmark')
+        rng = random.Random(options['seed'])
+
+        sellers = [self.create_team(f'seller{i}') for i in range(options['sellers'])]
+        buyers = [self.create_team(f'buyer{i}') for i in range(options['buyers'])]
+        teams = sellers + buyers
+        market_players = rng.sample(list(Player.objects.filter(team__in=sellers)), options['transfers'])
+        for player in market_players:
+            Transfer.objects.create(player=player, price=rng.randint(100000, 1000000) * CENTS)
+        budget_before = Team.objects.filter(id__in=[team.id for team in teams]).aggregate(total=Sum('budget'))['total']
+
+        attempts = [(rng.choice(buyers).owner, rng.choice(market_players).id) for _ in range(options['attempts'])]
+        outcomes = Counter()
+        outcomes_lock = threading.Lock()
+
+        def run_worker(worker_attempts):
+            # every thread gets its own database connection, closed once its share of attempts is done
+            try:
+                for user, player_id in worker_attempts:
+                    outcome = self.attempt_buy(user, player_id)
+                    with outcomes_lock:
+                        outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=run_worker, args=(attempts[i::options['workers']],))
+            for i in range(options['workers'])
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+
+        for outcome, count in outcomes.most_common():
+            self.stdout.write(f'{count:>8}  {outcome}')
+        self.stdout.write(
+            f'{len(attempts)} attempts in {elapsed:.2f}s: {len(attempts) / elapsed:.1f} attempts/s, '
+            f'{outcomes["bought"] / elapsed:.1f} purchases/s with {options["workers"]} workers'
+        )
+
+        errors = self.check_consistency(teams, market_players, budget_before, outcomes['bought'])
+        if not options['keep']:
+            Transfer.objects.filter(player__in=market_players).delete()
+            User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+        if errors:
+            raise CommandError('inconsistent market after benchmark:\n' + '\n'.join(errors))
+        self.stdout.write(self.style.SUCCESS('market stayed consistent'))
+
+    def attempt_buy(self, user, player_id):
+        try:
+            player_buy(player_id, user=user)
+        except APIException as exc:
+            detail = exc.detail.get('detail', exc.detail) if isinstance(exc.detail, dict) else exc.detail
+            return f'rejected: {detail}'
+        except DatabaseError as exc:
+            return f'database error: {exc.__class__.__name__}: {exc}'.strip()
+        return 'bought'
+
+    def create_team(self, name):
+        user = User.objects.create_user(email=f'{EMAIL_PREFIX}-{name}@onlinesoccermanager.com')
+        return generate_team_with_players(user)
+
+    def check_consistency(self, teams, market_players, budget_before, purchases):
+        errors = []
+        team_ids = [team.id for team in teams]
+        budget_after = Team.objects.filter(id__in=team_ids).aggregate(total=Sum('budget'))['total']
+        if budget_after != budget_before:
+            errors.append(f'total budget changed from {budget_before} to {budget_after}')
+        if Team.objects.filter(id__in=team_ids, budget__lt=0).exists():
+            errors.append('a team ended up with a negative budget')
+
+        completed = Transfer.objects.filter(player__in=market_players, status=TransferStatus.COMPLETE)
+        if completed.count() != purchases:
+            errors.append(f'{purchases} purchases succeeded but {completed.count()} transfers are complete')
+        if completed.values('player').distinct().count() != completed.count():
+            errors.append('a player was sold more than once')
+        for transfer in completed.select_related('player'):
+            if transfer.player.team_id != transfer.buyer_id:
+                errors.append(f'player {transfer.player_id} is not in the team that bought it')
+
+        for team in Team.objects.filter(id__in=team_ids):
+            if team.value != team.compute_value():
+                errors.append(f'team {team.id} value {team.value} does not match its players')
+        return errors
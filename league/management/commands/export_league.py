@@ -0,0 +1,54 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from django.utils.text import compress_sequence
+from rest_framework.exceptions import ValidationError
+from league.exports import CSV, EXPORTS, FORMATS, export_queryset, export_stream
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream the players, teams or transfers table as CSV or NDJSON, the same rows as /api/league/export/. '
+        'memory use does not grow with the table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default=CSV)
+        parser.add_argument('--output', default='-', help='file to write, - for stdout')
+        parser.add_argument('--gzip', action='store_true', help='gzip the output while it is written')
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='NAME=VALUE',
+            help='filter of the matching list endpoint, e.g. --filter position=attacker --filter min_age=30'
+        )
+        parser.add_argument('--chunk-size', type=int, default=None, help='rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        filters = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'filters are given as NAME=VALUE, got {item!r}')
+            filters.appendlist(name, value)
+        try:
+            rows = export_queryset(options['export'], filters)
+        except ValidationError as error:
+            raise CommandError(f'invalid filters: {error.detail}')
+
+        content = export_stream(options['export'], rows, options['format'], options['chunk_size'])
+        if options['gzip']:
+            content = compress_sequence(content)
+
+        started = time.monotonic()
+        written = 0
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for data in content:
+                output.write(data)
+                written += len(data)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        # stdout may be the export itself
+        self.stderr.write(f'exported {options["export"]}: {written} bytes in {time.monotonic() - started:.1f}s')
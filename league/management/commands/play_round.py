@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from league.matches import round_play, round_play_next, round_schedule
+
+
+class Command(BaseCommand):
+    help = (
+        'Play the oldest round with unplayed fixtures, scheduling a new round of every owned team first '
+        'when there is none. this is what the play_next_round celery task runs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--round', type=int, default=None, help='play this round instead')
+        parser.add_argument('--schedule', action='store_true', help='always schedule a new round and play it')
+        parser.add_argument('--seed', type=int, default=None, help='seed of the pairings and of the results')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['schedule']:
+            options['round'] = round_schedule(options['seed'])
+            if options['round'] is None:
+                self.stdout.write(self.style.WARNING('fewer than two teams are owned, no round was scheduled'))
+                return
+            self.stdout.write(f'scheduled round {options["round"]} in {time.monotonic() - started:.1f}s')
+        if options['round'] is not None:
+            result = round_play(options['round'], options['seed'])
+        else:
+            result = round_play_next(options['seed'])
+            if result.round is None:
+                self.stdout.write(self.style.WARNING('fewer than two teams are owned, no round was scheduled'))
+                return
+        self.stdout.write(
+            f'round {result.round}: {result.home_wins} home wins, {result.draws} draws, '
+            f'{result.away_wins} away wins, {result.goals} goals'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'played {result.fixtures} fixtures in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from league.cache import TEAMS, versions_bump
+from league.models import Team, Player
+from onlinesoccermanager.money import MoneyField
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored Team.value column from players in chunks and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='number of teams checked per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='report drift without writing any changes')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        players_value = Subquery(
+            Player.objects.filter(team=OuterRef('pk'))
+            .order_by()
+            .values('team')
+            .annotate(total=Sum('value'))
+            .values('total')
+        )
+        teams_qs = Team.objects.annotate(
+            actual_value=Coalesce(players_value, Value(0), output_field=MoneyField())
+        ).only('id', 'value').order_by('id')
+
+        last_id = 0
+        checked = 0
+        drifted = 0
+        while True:
+            with transaction.atomic():
+                teams = list(teams_qs.filter(id__gt=last_id).select_for_update(of=('self',))[:chunk_size])
+                if not teams:
+                    break
+                stale_teams = []
+                for team in teams:
+                    if team.value != team.actual_value:
+                        self.stdout.write(f'team {team.id}: stored {team.value}, actual {team.actual_value}')
+                        team.value = team.actual_value
+                        team.updated_at = timezone.now()
+                        stale_teams.append(team)
+                if stale_teams and not dry_run:
+                    Team.objects.bulk_update(stale_teams, ['value', 'updated_at'])
+            checked += len(teams)
+            drifted += len(stale_teams)
+            last_id = teams[-1].id
+
+        if drifted and not dry_run:
+            versions_bump(TEAMS)
+        action = 'found' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'checked {checked} teams, {action} {drifted} with drifted value'))
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from league.season import MIN_SEASON_DAYS, season_rollover
+from onlinesoccermanager.money import Money
+from oscsettings.models import LeagueSettings
+
+
+class Command(BaseCommand):
+    help = (
+        'Age every player by a year and revalue them from age, position and recent transfer prices, '
+        'then update team values. run it once per season'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--market-days', type=int, default=365, help='completed transfers of this many days set market prices'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='rows per fetch and per UPDATE statement')
+        parser.add_argument('--dry-run', action='store_true', help='compute the new values without writing them')
+        parser.add_argument(
+            '--force', action='store_true',
+            help=f'roll over even if the season started less than {MIN_SEASON_DAYS} days ago'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rollover = season_rollover(options['market_days'], options['chunk_size'], options['dry_run'], options['force'])
+        elapsed = time.monotonic() - started
+        if rollover is None:
+            league_settings = LeagueSettings.objects.get(pk=1)
+            raise CommandError(
+                f'season {league_settings.season} started on {league_settings.season_started_at:%Y-%m-%d}, '
+                f'less than {MIN_SEASON_DAYS} days ago. pass --force to roll it over again'
+            )
+        self.stdout.write(
+            f'{rollover.market_cells} age and position market prices, '
+            f'total player value {Money(rollover.value_before)} -> {Money(rollover.value_after)}'
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'dry run over {rollover.players} players in {elapsed:.1f}s'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'aged {rollover.players} players and revalued {rollover.teams} teams in {elapsed:.1f}s'
+            ))
@@ -0,0 +1,133 @@
+import random
+import time
+from faker import Faker
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from league.bulk import copy_rows, reserve_ids
+from league.cache import PLAYERS, TEAMS, TRANSFERS, versions_bump
+from league.constants import TransferStatus
+from league.models import Team, Player, Transfer
+from league.services import SQUAD_POSITIONS
+from onlinesoccermanager.money import CENTS
+from oscsettings.models import LeagueSettings
+
+User = get_user_model()
+
+FIRST_NAMES_POOL_SIZE = 1000
+LAST_NAMES_POOL_SIZE = 1000
+CITIES_POOL_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk load a league of N users, N teams, 20N players and pending transfers through PostgreSQL COPY. '
+        'The same --seed always produces the same league'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=1000, help='number of users and teams to create')
+        parser.add_argument('--transfers', type=int, default=0, help='number of pending transfers to list on the market')
+        parser.add_argument('--seed', type=int, default=0, help='random seed, also part of the generated emails and team names')
+        parser.add_argument('--batch-size', type=int, default=10000, help='teams written per COPY batch and transaction')
+        parser.add_argument('--password', default='onlinesoccermanager', help='password of every seeded user')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('seed_league loads data with COPY and needs a PostgreSQL database')
+        number_of_teams = options['teams']
+        seed = options['seed']
+        batch_size = options['batch_size']
+        if User.objects.filter(email=self.get_email(seed, 0)).exists():
+            raise CommandError(f'a league has already been seeded with --seed={seed}, pick another seed')
+
+        self.rng = random.Random(seed)
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first_names = [fake.first_name() for _ in range(FIRST_NAMES_POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(LAST_NAMES_POOL_SIZE)]
+        self.cities = [fake.city() for _ in range(CITIES_POOL_SIZE)]
+        self.password = make_password(options['password'])
+        self.league_settings = LeagueSettings.load()
+
+        started = time.monotonic()
+        team_ids = []
+        player_ids = []
+        for offset in range(0, number_of_teams, batch_size):
+            size = min(batch_size, number_of_teams - offset)
+            with transaction.atomic():
+                batch_team_ids, batch_player_ids = self.seed_batch(seed, offset, size)
+            team_ids.extend(batch_team_ids)
+            player_ids.extend(batch_player_ids)
+            self.stdout.write(f'{offset + size}/{number_of_teams} teams seeded')
+
+        number_of_transfers = min(options['transfers'], len(player_ids))
+        if number_of_transfers:
+            with transaction.atomic():
+                self.seed_transfers(self.rng.sample(range(len(player_ids)), number_of_transfers), team_ids, player_ids)
+
+        versions_bump(TEAMS, PLAYERS, TRANSFERS)
+        self.stdout.write(self.style.SUCCESS(
+            f'seeded {number_of_teams} teams, {len(player_ids)} players and {number_of_transfers} pending transfers '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
+
+    def get_email(self, seed, index):
+        return f'seed{seed}.{index}@onlinesoccermanager.com'
+
+    def seed_batch(self, seed, offset, size):
+        rng = self.rng
+        now = timezone.now().isoformat()
+        country = self.league_settings.default_country.code
+        budget = int(self.league_settings.initial_team_budget)
+        player_value = int(self.league_settings.initial_player_value)
+        team_value = player_value * len(SQUAD_POSITIONS)
+
+        user_ids = reserve_ids(User, size)
+        team_ids = reserve_ids(Team, size)
+        player_ids = reserve_ids(Player, size * len(SQUAD_POSITIONS))
+
+        copy_rows(
+            User,
+            ('id', 'password', 'last_login', 'is_superuser', 'first_name', 'last_name', 'email', 'is_email_verified',
+             'is_staff', 'is_active', 'date_joined', 'profile_completed', 'token_version'),
+            (
+                (user_id, self.password, now, 'f', rng.choice(self.first_names), rng.choice(self.last_names),
+                 self.get_email(seed, offset + i), 'f', 'f', 't', now, 'f', 0)
+                for i, user_id in enumerate(user_ids)
+            )
+        )
+        copy_rows(
+            Team,
+            ('id', 'owner_id', 'name', 'country', 'budget', 'value', 'updated_at'),
+            (
+                (team_id, user_id, f'{rng.choice(self.cities)} {seed}-{offset + i}', country, budget, team_value, now)
+                for i, (team_id, user_id) in enumerate(zip(team_ids, user_ids))
+            )
+        )
+        squad_size = len(SQUAD_POSITIONS)
+        copy_rows(
+            Player,
+            ('id', 'first_name', 'last_name', 'position', 'age', 'country', 'team_id', 'value', 'pooled', 'updated_at'),
+            (
+                (player_id, rng.choice(self.first_names), rng.choice(self.last_names), SQUAD_POSITIONS[i % squad_size],
+                 rng.randint(18, 40), country, team_ids[i // squad_size], player_value, 'f', now)
+                for i, player_id in enumerate(player_ids)
+            )
+        )
+        return team_ids, player_ids
+
+    def seed_transfers(self, player_indexes, team_ids, player_ids):
+        # players are laid out squad by squad, so a player's index gives away its team
+        squad_size = len(SQUAD_POSITIONS)
+        now = timezone.now().isoformat()
+        copy_rows(
+            Transfer,
+            ('seller_id', 'player_id', 'price', 'status', 'updated_at'),
+            (
+                (team_ids[i // squad_size], player_ids[i], self.rng.randint(100000, 3000000) * CENTS, TransferStatus.PENDING, now)
+                for i in player_indexes
+            )
+        )
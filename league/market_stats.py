@@ -0,0 +1,218 @@
+'''
+    transfer market analytics behind /market/stats/. completed transfers are rolled up per hour, position,
+    country and price bin into league.models.MarketStats, so a window query sums a few hundred rows whatever
+    the size of the transfers table. a transfer is added to its hourly row once the transaction that completes
+    it commits, hourly rows older than MARKET_STATS_HOURLY_DAYS are compacted into daily rows and the whole table
+    can be rebuilt from the transfers table. price bins grow geometrically, BINS_PER_OCTAVE of them for every
+    doubling of the price, so a percentile read from them is off by less than the 4.4% width of a bin
+'''
+import logging
+import math
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Optional, Sequence
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from league.cache import TRANSFERS, versions_bump
+from league.constants import StatsGranularity, TransferStatus
+from league.models import MarketStats, Player, Transfer
+from onlinesoccermanager.money import Money
+
+logger = logging.getLogger(__name__)
+
+BINS_PER_OCTAVE = 16
+# upper bounds of the price bins in cents. bin n holds the prices from PRICE_BIN_EDGES[n - 1] up to
+# PRICE_BIN_EDGES[n], the numbering of postgres width_bucket so the backfill bins prices in SQL
+PRICE_BIN_EDGES = sorted({math.ceil(2 ** (step / BINS_PER_OCTAVE)) for step in range(BINS_PER_OCTAVE * 60 + 1)})
+PERCENTILES = (10, 25, 50, 75, 90)
+WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    '365d': timedelta(days=365),
+}
+# the ?group_by= choices of /market/stats/
+GROUPINGS = {
+    'position,country': ('position', 'country'),
+    'position': ('position',),
+    'country': ('country',),
+    'none': (),
+}
+
+STATS_TABLE = MarketStats._meta.db_table
+STATS_COLUMNS = 'bucket, granularity, position, country, price_bin, transfers, turnover, markups, markup_total'
+UPSERT_CONFLICT = '''
+    ON CONFLICT (bucket, granularity, position, country, price_bin) DO UPDATE SET
+        transfers = stats.transfers + EXCLUDED.transfers,
+        turnover = stats.turnover + EXCLUDED.turnover,
+        markups = stats.markups + EXCLUDED.markups,
+        markup_total = stats.markup_total + EXCLUDED.markup_total
+'''
+RECORD_SQL = f'''
+    INSERT INTO {STATS_TABLE} AS stats ({STATS_COLUMNS}) VALUES (%s, %s, %s, %s, %s, 1, %s, %s, %s)
+    {UPSERT_CONFLICT}
+'''
+BACKFILL_SQL = f'''
+    INSERT INTO {STATS_TABLE} ({STATS_COLUMNS})
+    SELECT date_trunc('hour', transfer.updated_at), %s, player.position, player.country,
+        width_bucket(transfer.price, %s::bigint[]), count(*), sum(transfer.price), count(transfer.markup),
+        coalesce(sum(transfer.markup), 0)
+    FROM {Transfer._meta.db_table} transfer JOIN {Player._meta.db_table} player ON player.id = transfer.player_id
+    WHERE transfer.status = %s
+    GROUP BY 1, 3, 4, 5
+'''
+COMPACT_SQL = f'''
+    WITH compacted AS (
+        DELETE FROM {STATS_TABLE} WHERE granularity = %s AND bucket < %s
+        RETURNING bucket, position, country, price_bin, transfers, turnover, markups, markup_total
+    )
+    INSERT INTO {STATS_TABLE} AS stats ({STATS_COLUMNS})
+    SELECT date_trunc('day', bucket), %s, position, country, price_bin,
+        sum(transfers), sum(turnover), sum(markups), sum(markup_total)
+    FROM compacted
+    GROUP BY 1, 3, 4, 5
+    {UPSERT_CONFLICT}
+'''
+
+
+def price_bin(price: int) -> int:
+    return bisect_right(PRICE_BIN_EDGES, price)
+
+
+def price_bin_bounds(index: int):
+    lower = PRICE_BIN_EDGES[index - 1] if index else 0
+    upper = PRICE_BIN_EDGES[index] if index < len(PRICE_BIN_EDGES) else lower * 2 ** (1 / BINS_PER_OCTAVE)
+    return lower, upper
+
+
+def truncate_to_hour(moment: datetime) -> datetime:
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def truncate_to_day(moment: datetime) -> datetime:
+    return truncate_to_hour(moment).replace(hour=0)
+
+
+def hourly_cutoff(now: Optional[datetime] = None) -> datetime:
+    ''' hourly rows before this day boundary are compacted into daily rows '''
+    return truncate_to_day(now or timezone.now()) - timedelta(days=settings.MARKET_STATS_HOURLY_DAYS)
+
+
+def market_stats_record(transfer: Transfer, player: Player) -> None:
+    '''
+        adds a transfer completed by the current transaction to its hourly row once it commits. the upsert
+        runs on its own, outside the purchase, as its row lock is shared by every purchase of the same hour,
+        position, country and price bin and would otherwise make them wait on each other
+    '''
+    params = [
+        truncate_to_hour(transfer.updated_at), StatsGranularity.HOUR, player.position, player.country.code,
+        price_bin(transfer.price), int(transfer.price), int(transfer.markup is not None), transfer.markup or 0
+    ]
+
+    def record():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(RECORD_SQL, params)
+        except Exception:
+            # the purchase is already committed, the stats miss it until the next backfill
+            logger.exception('could not add the transfer of player %s to the market stats', player.id)
+
+    transaction.on_commit(record)
+
+
+@transaction.atomic
+def market_stats_backfill() -> int:
+    '''
+        rebuilds every row from the completed transfers, then compacts them. transfers of deleted players
+        are left out. returns the number of hourly rows rebuilt
+    '''
+    with connection.cursor() as cursor:
+        # transfers completing meanwhile wait for the rebuilt rows to be committed and are added on top
+        # of them once. only one committed just before the lock and recorded after it is counted twice
+        cursor.execute(f'LOCK TABLE {STATS_TABLE} IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {STATS_TABLE}')
+        cursor.execute(BACKFILL_SQL, [StatsGranularity.HOUR, PRICE_BIN_EDGES, TransferStatus.COMPLETE])
+        rebuilt = cursor.rowcount
+    versions_bump(TRANSFERS)
+    market_stats_compact()
+    return rebuilt
+
+
+@transaction.atomic
+def market_stats_compact(now: Optional[datetime] = None) -> int:
+    ''' folds hourly rows of whole days past the hourly retention into daily rows, returns the daily rows written '''
+    with connection.cursor() as cursor:
+        cursor.execute(COMPACT_SQL, [StatsGranularity.HOUR, hourly_cutoff(now), StatsGranularity.DAY])
+        compacted = cursor.rowcount
+    versions_bump(TRANSFERS)
+    return compacted
+
+
+def window_start(window: str, now: Optional[datetime] = None) -> datetime:
+    ''' windows start on an hour, or on a day once they reach past the hourly rows '''
+    now = now or timezone.now()
+    since = truncate_to_hour(now - WINDOWS[window])
+    if since < hourly_cutoff(now):
+        since = truncate_to_day(since)
+    return since
+
+
+def price_percentiles(bins: Sequence[tuple], transfers: int) -> dict:
+    ''' estimated from (price bin, transfers) pairs in bin order, interpolating geometrically inside a bin '''
+    percentiles = {}
+    bins = iter(bins)
+    index, count = next(bins)
+    below = 0
+    for percentile in PERCENTILES:
+        rank = transfers * percentile / 100
+        while below + count < rank:
+            below += count
+            index, count = next(bins)
+        lower, upper = price_bin_bounds(index)
+        fraction = (rank - below) / count
+        price = lower * (upper / lower) ** fraction if lower else upper * fraction
+        percentiles[f'p{percentile}'] = Money(round(price))
+    return percentiles
+
+
+def market_stats_list(
+    since: datetime, group_by: Sequence[str], position: Optional[str] = None, country: Optional[str] = None
+) -> List[dict]:
+    ''' one row of stats per group, from the rollup rows starting at since or later '''
+    queryset = MarketStats.objects.filter(bucket__gte=since)
+    if position:
+        queryset = queryset.filter(position=position)
+    if country:
+        queryset = queryset.filter(country=country)
+    rows = (
+        queryset.values(*group_by, 'price_bin')
+        .annotate(
+            bin_transfers=Sum('transfers'), bin_turnover=Sum('turnover'),
+            bin_markups=Sum('markups'), bin_markup_total=Sum('markup_total'),
+        )
+        .order_by(*group_by, 'price_bin')
+    )
+
+    stats = []
+    for key, group_rows in groupby(rows, key=itemgetter(*group_by) if group_by else lambda row: ()):
+        group_rows = list(group_rows)
+        transfers = sum(row['bin_transfers'] for row in group_rows)
+        turnover = Money(sum(row['bin_turnover'] for row in group_rows))
+        markups = sum(row['bin_markups'] for row in group_rows)
+        markup_total = sum(row['bin_markup_total'] for row in group_rows)
+        group = dict(zip(group_by, key if len(group_by) > 1 else (key,)))
+        group.update(
+            transfers=transfers,
+            turnover=turnover,
+            average_price=turnover.scale(1, transfers),
+            average_markup=round(float(markup_total) / markups, 1) if markups else None,
+            price_percentiles=price_percentiles(
+                [(row['price_bin'], row['bin_transfers']) for row in group_rows], transfers
+            ),
+        )
+        stats.append(group)
+    return stats
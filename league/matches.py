@@ -0,0 +1,169 @@
+'''
+    match engine. a round pairs every owned team with another one at random and is then played in one pass:
+    the players of every team in the round are pulled in one query, each team's lineup strength is built with
+    numpy, the goals of every fixture are drawn at once from poisson distributions and the results are
+    loaded through COPY
+'''
+from typing import NamedTuple, Optional
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from league.bulk import copy_rows
+from league.constants import PlayerPosition
+from league.models import Fixture, MatchResult, Player, Team
+
+POSITIONS = [position.value for position in PlayerPosition]
+# players fielded per position, in POSITIONS order
+LINEUP = np.array([1, 4, 4, 2])
+# share of each position, in POSITIONS order, in a team's attack and in its defense
+ATTACK_WEIGHTS = np.array([0.0, 0.1, 0.35, 0.55])
+DEFENSE_WEIGHTS = np.array([0.3, 0.5, 0.2, 0.0])
+# form of a player by age, on top of the log of their value
+FORM_AGES = (17, 21, 25, 29, 32, 36, 40)
+FORM = (-0.3, -0.1, 0.0, 0.0, -0.1, -0.3, -0.6)
+# rating of an empty lineup slot, the log of a tenth of the median player value
+MISSING_PLAYER_RATING = np.log(0.1)
+# expected goals of a side when both teams are equally strong, and the home side's advantage
+BASE_GOALS = 1.3
+HOME_ADVANTAGE = 0.15
+STRENGTH_SCALE = 0.6
+MAX_EXPECTED_GOALS = 8.0
+
+ROUND_PLAYERS_SQL = f'''
+    SELECT team_id, array_position(%s::varchar[], position), age, value FROM {Player._meta.db_table}
+    WHERE team_id IN (
+        SELECT home_id FROM {Fixture._meta.db_table} WHERE round = %s
+        UNION ALL SELECT away_id FROM {Fixture._meta.db_table} WHERE round = %s
+    )
+'''
+
+
+class RoundResult(NamedTuple):
+    # None when no round could be scheduled
+    round: Optional[int]
+    fixtures: int
+    home_wins: int
+    draws: int
+    away_wins: int
+    goals: int
+
+
+def fixtures_lock() -> None:
+    ''' held until the transaction ends. it still lets rounds be read and played, only schedulers queue on it '''
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {Fixture._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+
+
+def round_schedule(seed: Optional[int] = None) -> Optional[int]:
+    '''
+        pairs every owned team with another at random in a new round, returns the round. an odd team out sits it
+        out. returns None without scheduling a round when fewer than two teams are owned
+    '''
+    rng = np.random.default_rng(seed)
+    team_ids = np.fromiter(
+        Team.objects.filter(owner__isnull=False).order_by('id').values_list('id', flat=True), dtype=np.int64
+    )
+    pairs = rng.permutation(team_ids)[:len(team_ids) // 2 * 2].reshape(-1, 2)
+    if not len(pairs):
+        return None
+    with transaction.atomic():
+        # a concurrent scheduler waits here and numbers its round after this one
+        fixtures_lock()
+        round_number = (Fixture.objects.aggregate(last=Max('round'))['last'] or 0) + 1
+        copy_rows(
+            Fixture, ('round', 'home_id', 'away_id'), ((round_number, home, away) for home, away in pairs.tolist())
+        )
+    return round_number
+
+
+def team_strengths(team_ids: np.ndarray, players: np.ndarray) -> tuple:
+    '''
+        attack and defense of the teams, in team_ids order, from their (team id, position index, age, value) rows.
+        the best rated players of each position fill the lineup, empty slots get MISSING_PLAYER_RATING
+    '''
+    strengths = np.full((len(team_ids), len(POSITIONS)), MISSING_PLAYER_RATING)
+    if len(players):
+        teams = np.searchsorted(team_ids, players[:, 0])
+        positions = players[:, 1]
+        values = np.maximum(players[:, 3], 1)
+        ratings = np.log(values / np.median(values)) + np.interp(players[:, 2], FORM_AGES, FORM)
+        # best first within each team and position, then each player's rank in that line
+        order = np.lexsort((-ratings, positions, teams))
+        lines = teams[order] * len(POSITIONS) + positions[order]
+        line_starts = np.r_[0, np.flatnonzero(lines[1:] != lines[:-1]) + 1]
+        ranks = np.arange(len(lines)) - np.repeat(line_starts, np.diff(np.r_[line_starts, len(lines)]))
+        fielded = ranks < LINEUP[positions[order]]
+        slots = len(team_ids) * len(POSITIONS)
+        totals = np.bincount(lines[fielded], weights=ratings[order][fielded], minlength=slots)
+        counts = np.bincount(lines[fielded], minlength=slots)
+        missing = np.tile(LINEUP, len(team_ids)) - counts
+        strengths = ((totals + missing * MISSING_PLAYER_RATING) / np.tile(LINEUP, len(team_ids))).reshape(
+            len(team_ids), len(POSITIONS)
+        )
+    return strengths @ ATTACK_WEIGHTS, strengths @ DEFENSE_WEIGHTS
+
+
+def match_goals(home_attack, home_defense, away_attack, away_defense, rng: np.random.Generator) -> tuple:
+    ''' goals of every fixture, drawn at once from the expected goals of each side '''
+    home_expected = BASE_GOALS * np.exp(STRENGTH_SCALE * (home_attack - away_defense) + HOME_ADVANTAGE)
+    away_expected = BASE_GOALS * np.exp(STRENGTH_SCALE * (away_attack - home_defense))
+    return (
+        rng.poisson(np.minimum(home_expected, MAX_EXPECTED_GOALS)),
+        rng.poisson(np.minimum(away_expected, MAX_EXPECTED_GOALS)),
+    )
+
+
+@transaction.atomic
+def round_play(round_number: int, seed: Optional[int] = None) -> RoundResult:
+    '''
+        plays every fixture of the round that has no result yet. the fixtures are locked, so a concurrent
+        run of the same round skips them instead of playing them twice
+    '''
+    fixtures = np.array(
+        Fixture.objects.select_for_update(skip_locked=True, of=('self',))
+        .filter(round=round_number, result__isnull=True)
+        .order_by('id')
+        .values_list('id', 'home_id', 'away_id'),
+        dtype=np.int64
+    ).reshape(-1, 3)
+    if not len(fixtures):
+        return RoundResult(round_number, 0, 0, 0, 0, 0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(ROUND_PLAYERS_SQL, [POSITIONS, round_number, round_number])
+        players = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 4)
+    players[:, 1] -= 1
+    team_ids = np.unique(fixtures[:, 1:])
+    attack, defense = team_strengths(team_ids, players)
+    home = np.searchsorted(team_ids, fixtures[:, 1])
+    away = np.searchsorted(team_ids, fixtures[:, 2])
+    home_goals, away_goals = match_goals(
+        attack[home], defense[home], attack[away], defense[away], np.random.default_rng(seed)
+    )
+
+    played_at = timezone.now()
+    copy_rows(
+        MatchResult, ('fixture_id', 'home_goals', 'away_goals', 'played_at'),
+        ((fixture, home_score, away_score, played_at)
+         for fixture, home_score, away_score in zip(fixtures[:, 0].tolist(), home_goals.tolist(), away_goals.tolist()))
+    )
+    return RoundResult(
+        round_number, len(fixtures), int((home_goals > away_goals).sum()), int((home_goals == away_goals).sum()),
+        int((home_goals < away_goals).sum()), int(home_goals.sum() + away_goals.sum())
+    )
+
+
+@transaction.atomic
+def round_play_next(seed: Optional[int] = None) -> RoundResult:
+    '''
+        plays the oldest round with unplayed fixtures, scheduling a new round when every round has been played.
+        a concurrent run waits for this one to commit, so it cannot find the same rounds played and schedule
+        another one alongside
+    '''
+    fixtures_lock()
+    unplayed = Fixture.objects.filter(result__isnull=True).aggregate(first=Min('round'))['first']
+    round_number = unplayed if unplayed is not None else round_schedule(seed)
+    if round_number is None:
+        return RoundResult(None, 0, 0, 0, 0, 0)
+    return round_play(round_number, seed)
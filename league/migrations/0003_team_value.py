@@ -0,0 +1,26 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:30
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='value',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0'), max_digits=65),
+        ),
+        migrations.RunSQL(
+            sql=(
+                'UPDATE league_team SET value = COALESCE('
+                '(SELECT SUM(league_player.value) FROM league_player WHERE league_player.team_id = league_team.id), 0)'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('league', '0003_team_value'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='owner',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='team', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(condition=models.Q(('owner__isnull', True)), fields=['id'], name='league_team_pool_idx'),
+        ),
+    ]
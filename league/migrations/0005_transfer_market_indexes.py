@@ -0,0 +1,38 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0004_team_pool'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='league_transfer_market_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['price', 'id'], name='league_transfer_market_price'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['seller', 'id'], name='league_transfer_market_seller'),
+        ),
+        # before the constraint, only the latest pending transfer of a player stays on the market
+        migrations.RunSQL(
+            sql=(
+                "DELETE FROM league_transfer WHERE status = 'pending' AND EXISTS ("
+                "SELECT 1 FROM league_transfer newer WHERE newer.status = 'pending' "
+                "AND newer.player_id = league_transfer.player_id AND newer.id > league_transfer.id)"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='transfer',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('player',), name='league_transfer_one_pending_per_player'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0005_transfer_market_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['age', 'id'], name='league_player_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['value', 'id'], name='league_player_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['country', 'age', 'id'], name='league_player_country_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['country', 'value', 'id'], name='league_player_country_val_idx'),
+        ),
+    ]
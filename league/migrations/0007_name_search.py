@@ -0,0 +1,25 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:50
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0006_player_search_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='player',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['first_name', 'last_name'], name='league_player_name_trgm_idx', opclasses=['gin_trgm_ops', 'gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.comparison.Cast('name', models.TextField()), name='gin_trgm_ops'), name='league_team_name_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:12
+
+from django.db import migrations
+import league.models
+import onlinesoccermanager.money
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0008_updated_at'),
+    ]
+
+    # AlterField would cast the amounts as they are, they have to be multiplied into cents.
+    # one ALTER TABLE per table so each is rewritten once
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                'ALTER TABLE league_team '
+                'ALTER COLUMN budget TYPE bigint USING round(budget * 100)::bigint, '
+                'ALTER COLUMN value TYPE bigint USING round(value * 100)::bigint',
+                'ALTER TABLE league_player ALTER COLUMN value TYPE bigint USING round(value * 100)::bigint',
+                'ALTER TABLE league_transfer ALTER COLUMN price TYPE bigint USING round(price * 100)::bigint',
+            ],
+            reverse_sql=[
+                'ALTER TABLE league_team '
+                'ALTER COLUMN budget TYPE numeric(65, 2) USING budget / 100.0, '
+                'ALTER COLUMN value TYPE numeric(65, 2) USING value / 100.0',
+                'ALTER TABLE league_player ALTER COLUMN value TYPE numeric(65, 2) USING value / 100.0',
+                'ALTER TABLE league_transfer ALTER COLUMN price TYPE numeric(65, 2) USING price / 100.0',
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='player',
+                    name='value',
+                    field=onlinesoccermanager.money.MoneyField(default=league.models.get_initial_player_value),
+                ),
+                migrations.AlterField(
+                    model_name='team',
+                    name='budget',
+                    field=onlinesoccermanager.money.MoneyField(default=league.models.get_initial_team_budget),
+                ),
+                migrations.AlterField(
+                    model_name='team',
+                    name='value',
+                    field=onlinesoccermanager.money.MoneyField(db_index=True, default=0),
+                ),
+                migrations.AlterField(
+                    model_name='transfer',
+                    name='price',
+                    field=onlinesoccermanager.money.MoneyField(),
+                ),
+            ],
+        ),
+    ]
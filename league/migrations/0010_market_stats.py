@@ -0,0 +1,42 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:20
+
+from django.db import migrations, models
+import django_countries.fields
+import onlinesoccermanager.money
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0009_money_in_cents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('position', models.CharField(choices=[('goalkeeper', 'GoalKeeper'), ('defender', 'Defender'), ('midfielder', 'Midfielder'), ('attacker', 'Attacker')], max_length=10)),
+                ('country', django_countries.fields.CountryField(max_length=2)),
+                ('price_bin', models.PositiveSmallIntegerField()),
+                ('transfers', models.PositiveIntegerField(default=0)),
+                ('turnover', onlinesoccermanager.money.MoneyField(default=0)),
+                ('markups', models.PositiveIntegerField(default=0)),
+                ('markup_total', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'market stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='transfer',
+            name='markup',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='marketstats',
+            constraint=models.UniqueConstraint(fields=('bucket', 'granularity', 'position', 'country', 'price_bin'), name='league_marketstats_key'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0010_market_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Fixture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.PositiveIntegerField()),
+                ('away', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='away_fixtures', to='league.team')),
+                ('home', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='home_fixtures', to='league.team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MatchResult',
+            fields=[
+                ('fixture', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result', serialize=False, to='league.fixture')),
+                ('home_goals', models.PositiveSmallIntegerField()),
+                ('away_goals', models.PositiveSmallIntegerField()),
+                ('played_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='fixture',
+            constraint=models.UniqueConstraint(fields=('round', 'home'), name='league_fixture_round_home'),
+        ),
+        migrations.AddConstraint(
+            model_name='fixture',
+            constraint=models.UniqueConstraint(fields=('round', 'away'), name='league_fixture_round_away'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.5 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0011_fixtures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='pooled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunSQL(
+            sql='UPDATE league_player SET pooled = true '
+                'WHERE team_id IN (SELECT id FROM league_team WHERE owner_id IS NULL)',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
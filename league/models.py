@@ -1,10 +1,12 @@
 from typing import Any
-from decimal import Decimal
 from django.contrib.postgres.fields import CICharField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Cast
 from django_countries.fields import CountryField
-from league.constants import PlayerPosition, TransferStatus
+from league.constants import PlayerPosition, StatsGranularity, TransferStatus
 from oscsettings.models import LeagueSettings
+from onlinesoccermanager.money import Money, MoneyField
 from users.models import User
 
 
@@ -19,18 +21,31 @@ def get_default_country():
 
 
 class Team(models.Model):
-    owner = models.OneToOneField(User, related_name='team', on_delete=models.CASCADE)
+    # teams without an owner make up the pool registrations claim from, see league.services.team_pool_claim
+    owner = models.OneToOneField(User, null=True, blank=True, related_name='team', on_delete=models.CASCADE)
     name = CICharField(max_length=100, unique=True)
     country = CountryField(default=get_default_country)
-    budget = models.DecimalField(max_digits=65, decimal_places=2, default=get_initial_team_budget)
+    budget = MoneyField(default=get_initial_team_budget)
+    # sum of players' values, kept up to date by league.services and the player post_delete signal.
+    # run `manage.py rebuild_team_values` to recompute it from the players table
+    value = MoneyField(default=0, db_index=True)
+    # version stamp behind the ETag of the team endpoints. every write has to move it,
+    # list it in update_fields and set it in queryset updates
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(owner__isnull=True), name='league_team_pool_idx'),
+            # name search, see league.selectors.search_by_similarity. pg_trgm has no citext operator class
+            GinIndex(OpClass(Cast('name', models.TextField()), name='gin_trgm_ops'), name='league_team_name_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
-    @property
-    def value(self):
+    def compute_value(self) -> Money:
         value = self.players.aggregate(total_value=models.Sum('value'))['total_value']
-        return value if value is not None else Decimal(0)
+        return value if value is not None else Money(0)
 
 
 class Player(models.Model):
@@ -40,7 +55,26 @@ class Player(models.Model):
     age = models.PositiveIntegerField()
     country = CountryField(default=get_default_country)
     team = models.ForeignKey(Team, related_name='players', on_delete=models.CASCADE)
-    value = models.DecimalField(max_digits=65, decimal_places=2, default=get_initial_player_value)
+    value = MoneyField(default=get_initial_player_value)
+    # players of a team waiting in the registration pool, hidden until the team is claimed. kept on the
+    # player so /players/ leaves them out without joining league_team, the indexes below still order the scan
+    pooled = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # back the /players/ sorts and range filters on age and value, alone or after a country filter.
+        # the id column matches the tiebreaker of league.selectors.order_by_with_tiebreaker. squads are
+        # small, so /teams/<id>/players/ only needs the team foreign key index
+        indexes = [
+            models.Index(fields=['age', 'id'], name='league_player_age_idx'),
+            models.Index(fields=['value', 'id'], name='league_player_value_idx'),
+            models.Index(fields=['country', 'age', 'id'], name='league_player_country_age_idx'),
+            models.Index(fields=['country', 'value', 'id'], name='league_player_country_val_idx'),
+            GinIndex(
+                fields=['first_name', 'last_name'], opclasses=['gin_trgm_ops', 'gin_trgm_ops'],
+                name='league_player_name_trgm_idx'
+            ),
+        ]
 
     def __str__(self):
         return ' '.join(filter(None, (self.first_name, self.last_name)))
@@ -50,8 +84,32 @@ class Transfer(models.Model):
     seller = models.ForeignKey(Team, null=True, blank=True, related_name='sold_players', on_delete=models.SET_NULL)
     buyer = models.ForeignKey(Team, null=True, blank=True, related_name='bought_players', on_delete=models.SET_NULL)
     player = models.ForeignKey(Player, null=True, blank=True, related_name='transfers', on_delete=models.SET_NULL)
-    price = models.DecimalField(max_digits=65, decimal_places=2)
+    price = MoneyField()
     status = models.CharField(max_length=8, choices=TransferStatus.choices, default=TransferStatus.PENDING)
+    # percent the player's value went up by when the transfer completed, unknown for older transfers
+    markup = models.PositiveSmallIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # the market only ever reads pending transfers, completed ones pile up as history. partial indexes
+        # keep market queries sized by the pending rows whatever the history grows to
+        constraints = [
+            models.UniqueConstraint(
+                fields=['player'], condition=models.Q(status=TransferStatus.PENDING),
+                name='league_transfer_one_pending_per_player'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status=TransferStatus.PENDING), name='league_transfer_market_idx'),
+            models.Index(
+                fields=['price', 'id'], condition=models.Q(status=TransferStatus.PENDING),
+                name='league_transfer_market_price'
+            ),
+            models.Index(
+                fields=['seller', 'id'], condition=models.Q(status=TransferStatus.PENDING),
+                name='league_transfer_market_seller'
+            ),
+        ]
 
     def save(self, *args: Any, **kwargs: Any) -> None:
         if not self.id:
@@ -61,3 +119,52 @@ class Transfer(models.Model):
                 self.seller = self.player.team
             self.buyer = None
         super().save(**kwargs)
+
+
+class MarketStats(models.Model):
+    '''
+        completed transfers rolled up per hour or day, position, country and price bin, behind /market/stats/.
+        kept up to date by league.market_stats, rebuilt from the transfers table by its backfill
+    '''
+    bucket = models.DateTimeField()
+    granularity = models.CharField(max_length=4, choices=StatsGranularity.choices)
+    position = models.CharField(max_length=10, choices=PlayerPosition.choices)
+    country = CountryField()
+    price_bin = models.PositiveSmallIntegerField()
+    transfers = models.PositiveIntegerField(default=0)
+    turnover = MoneyField(default=0)
+    # markup_total sums the markup of the transfers whose markup is known, markups counts them
+    markups = models.PositiveIntegerField(default=0)
+    markup_total = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'market stats'
+        # the conflict target of the incremental upserts, and the index of the window queries
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket', 'granularity', 'position', 'country', 'price_bin'], name='league_marketstats_key'
+            ),
+        ]
+
+
+class Fixture(models.Model):
+    ''' a match between two teams in a round, played by league.matches '''
+    round = models.PositiveIntegerField()
+    home = models.ForeignKey(Team, related_name='home_fixtures', on_delete=models.CASCADE)
+    away = models.ForeignKey(Team, related_name='away_fixtures', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['round', 'home'], name='league_fixture_round_home'),
+            models.UniqueConstraint(fields=['round', 'away'], name='league_fixture_round_away'),
+        ]
+
+    def __str__(self):
+        return f'round {self.round}: {self.home_id} v {self.away_id}'
+
+
+class MatchResult(models.Model):
+    fixture = models.OneToOneField(Fixture, primary_key=True, related_name='result', on_delete=models.CASCADE)
+    home_goals = models.PositiveSmallIntegerField()
+    away_goals = models.PositiveSmallIntegerField()
+    played_at = models.DateTimeField()
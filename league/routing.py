@@ -0,0 +1,6 @@
+from django.urls import path
+from league.consumers import MarketConsumer
+
+websocket_urlpatterns = [
+    path('ws/league/market/', MarketConsumer.as_asgi(), name='market_events'),
+]
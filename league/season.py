@@ -0,0 +1,165 @@
+'''
+    season rollover. every player gets a year older and is revalued from their age and position and from
+    what the market paid for players of the same age and position lately. the whole players table is loaded
+    into numpy arrays in one query, revalued at once and written back in chunked UPDATE ... FROM (VALUES ...)
+    statements, then the teams' values are summed from the new player values
+'''
+from datetime import timedelta
+from typing import NamedTuple, Optional
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+from psycopg2.extras import execute_values
+from league.cache import PLAYERS, TEAMS, versions_bump
+from league.constants import PlayerPosition, TransferStatus
+from league.models import Player, Team, Transfer
+from onlinesoccermanager.money import CENTS, MAX_DIGITS
+from oscsettings.models import LeagueSettings
+
+POSITIONS = [position.value for position in PlayerPosition]
+# value a player keeps over the season by age, relative to the peak age of their position
+AGE_CURVE_AGES = (-9, -4, 0, 3, 6, 9, 13)
+AGE_CURVE_FACTORS = (1.15, 1.08, 1.0, 0.92, 0.8, 0.65, 0.5)
+# age a player of each position, in POSITIONS order, is worth the most at
+PEAK_AGES = np.array([30, 28, 27, 26])
+# share of the new value set by the median price of recent transfers of players of the same age and position,
+# reached with MARKET_FULL_WEIGHT_TRANSFERS of them and scaled down below that
+MARKET_WEIGHT = 0.5
+MARKET_FULL_WEIGHT_TRANSFERS = 20
+MIN_VALUE = CENTS
+# a rollover this soon after the previous one is taken for a repeat and skipped unless forced
+MIN_SEASON_DAYS = 300
+MAX_VALUE = 10 ** MAX_DIGITS - 1
+
+PLAYERS_SQL = f'''
+    SELECT id, team_id, array_position(%s::varchar[], position), age, value
+    FROM {Player._meta.db_table} ORDER BY team_id, id
+'''
+MARKET_SQL = f'''
+    SELECT array_position(%s::varchar[], player.position), player.age,
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY transfer.price), count(*)
+    FROM {Transfer._meta.db_table} transfer JOIN {Player._meta.db_table} player ON player.id = transfer.player_id
+    WHERE transfer.status = %s AND transfer.updated_at >= %s
+    GROUP BY 1, 2
+'''
+UPDATE_PLAYERS_SQL = f'''
+    UPDATE {Player._meta.db_table} AS player
+    SET age = rollover.age, value = rollover.value, updated_at = statement_timestamp()
+    FROM (VALUES %s) AS rollover (id, age, value) WHERE player.id = rollover.id
+'''
+UPDATE_TEAMS_SQL = f'''
+    UPDATE {Team._meta.db_table} AS team SET value = rollover.value, updated_at = statement_timestamp()
+    FROM (VALUES %s) AS rollover (id, value) WHERE team.id = rollover.id AND team.value <> rollover.value
+'''
+
+
+class SeasonRollover(NamedTuple):
+    players: int
+    teams: int
+    market_cells: int
+    value_before: int
+    value_after: int
+
+
+def players_load(chunk_size: int) -> np.ndarray:
+    ''' id, team id, position index, age and value of every player, one row each, in team order '''
+    chunks = []
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(PLAYERS_SQL, [POSITIONS])
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.int64))
+    if not chunks:
+        return np.empty((0, 5), dtype=np.int64)
+    players = np.concatenate(chunks)
+    # array_position is 1-based
+    players[:, 2] -= 1
+    return players
+
+
+def market_prices(max_age: int, since) -> tuple:
+    ''' median price and number of completed transfers since the given time, by position index and age '''
+    medians = np.zeros((len(POSITIONS), max_age + 1))
+    transfers = np.zeros((len(POSITIONS), max_age + 1), dtype=np.int64)
+    with connection.cursor() as cursor:
+        cursor.execute(MARKET_SQL, [POSITIONS, TransferStatus.COMPLETE, since])
+        rows = cursor.fetchall()
+    for position, age, median, count in rows:
+        if age <= max_age:
+            medians[position - 1, age] = median
+            transfers[position - 1, age] = count
+    return medians, transfers, len(rows)
+
+
+def revalue(positions: np.ndarray, ages: np.ndarray, values: np.ndarray, medians: np.ndarray,
+            transfers: np.ndarray) -> np.ndarray:
+    ''' new values in cents of players of the given new ages '''
+    modeled = values * np.interp(ages - PEAK_AGES[positions], AGE_CURVE_AGES, AGE_CURVE_FACTORS)
+    weight = MARKET_WEIGHT * np.minimum(transfers[positions, ages] / MARKET_FULL_WEIGHT_TRANSFERS, 1)
+    new_values = modeled * (1 - weight) + medians[positions, ages] * weight
+    # clipped again once whole, float64 cannot hold MAX_VALUE exactly
+    return np.rint(np.clip(new_values, MIN_VALUE, MAX_VALUE)).astype(np.int64).clip(MIN_VALUE, MAX_VALUE)
+
+
+def season_rolled_over_recently(league_settings: LeagueSettings) -> bool:
+    started_at = league_settings.season_started_at
+    return started_at is not None and started_at > timezone.now() - timedelta(days=MIN_SEASON_DAYS)
+
+
+@transaction.atomic
+def season_rollover(market_days: int = 365, chunk_size: int = 5000, dry_run: bool = False,
+                    force: bool = False) -> Optional[SeasonRollover]:
+    '''
+        ages every player by a year and revalues them, then updates the value of every team whose players'
+        value changed and starts the next season. purchases and listings wait until the rollover commits.
+        returns None without touching anything when the season started less than MIN_SEASON_DAYS ago,
+        so a repeated command or redelivered task does not age the players twice, unless forced
+    '''
+    league_settings_rows = LeagueSettings.objects.all()
+    if not dry_run:
+        # exclusive locks still let the API read, but no purchase can lock a player row before they are released
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {Player._meta.db_table}, {Team._meta.db_table} IN EXCLUSIVE MODE')
+        # a concurrent rollover waits for this one and then finds the season it started
+        league_settings_rows = league_settings_rows.select_for_update()
+    league_settings, _ = league_settings_rows.get_or_create(pk=1)
+    if not force and season_rolled_over_recently(league_settings):
+        return None
+
+    players = players_load(chunk_size)
+    if not len(players):
+        return SeasonRollover(0, 0, 0, 0, 0)
+    ids, team_ids, positions, ages, values = players.T
+    ages = ages + 1
+    medians, transfers, market_cells = market_prices(
+        int(ages.max()), timezone.now() - timedelta(days=market_days)
+    )
+    new_values = revalue(positions, ages, values, medians, transfers)
+
+    # players come in team order, so each team's players are one run of the arrays
+    team_starts = np.flatnonzero(np.r_[True, team_ids[1:] != team_ids[:-1]])
+    team_values = np.add.reduceat(new_values, team_starts)
+    teams = 0
+    if not dry_run:
+        # players are written in id order, mostly the order of their rows in the table
+        order = np.argsort(ids)
+        with connection.cursor() as cursor:
+            execute_values(
+                cursor.cursor, UPDATE_PLAYERS_SQL,
+                zip(ids[order].tolist(), ages[order].tolist(), new_values[order].tolist()), page_size=chunk_size
+            )
+            for start in range(0, len(team_starts), chunk_size):
+                execute_values(
+                    cursor.cursor, UPDATE_TEAMS_SQL,
+                    zip(team_ids[team_starts[start:start + chunk_size]].tolist(),
+                        team_values[start:start + chunk_size].tolist()),
+                    page_size=chunk_size
+                )
+                teams += cursor.cursor.rowcount
+        versions_bump(TEAMS, PLAYERS)
+        league_settings.season += 1
+        league_settings.season_started_at = timezone.now()
+        league_settings.save()
+    return SeasonRollover(len(players), teams, market_cells, int(values.sum()), int(new_values.sum()))
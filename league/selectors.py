@@ -1,61 +1,143 @@
+from functools import reduce
+from operator import add, and_, or_
 from django.contrib.auth import get_user_model
-from rest_framework.exceptions import NotFound, ValidationError
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, Q, TextField
+from django.db.models.functions import Cast, Greatest
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import get_object_or_404
 from league.constants import TransferStatus
 from league.filters import TeamFilter, PlayerFilter, TransferFilter
 from league.models import Team, Player, Transfer
+from users.constants import TeamProvisioningStatus
 
 User = get_user_model()
 
+# fields read by the OutputSerializer of the view each selector feeds. keep them in sync
+# so a page of results is fetched in a single query without loading unused columns
+TEAM_LIST_FIELDS = ('id', 'name', 'country', 'value')
+PLAYER_LIST_FIELDS = ('id', 'first_name', 'last_name', 'age', 'position', 'country', 'value', 'team')
+TRANSFER_RELATED = ('player', 'seller')
+TRANSFER_LIST_FIELDS = (
+    'id', 'price', 'status', 'player', 'seller',
+    'player__id', 'player__first_name', 'player__last_name', 'player__position',
+    'seller__id', 'seller__name',
+)
+
+# version stamps of the rows each detail response is built from, the ETag of the response is made from them
+TEAM_STAMP_FIELDS = ('updated_at',)
+PLAYER_STAMP_FIELDS = ('updated_at', 'team__updated_at')
+TRANSFER_STAMP_FIELDS = ('updated_at', 'player__updated_at', 'seller__updated_at')
+
+# words of a search term that are matched, each must be found in one of the searched fields
+MAX_SEARCH_WORDS = 3
+
+
+def search_by_similarity(queryset, fields, search: str):
+    '''
+        keeps rows where every word of search is trigram similar to part of one of fields, annotated with the
+        summed word similarity as `similarity`. each field needs a pg_trgm GIN index for this to stay fast.
+        search must not be blank
+    '''
+    words = search.split()[:MAX_SEARCH_WORDS]
+    matches = [reduce(or_, (Q(**{f'{field}__trigram_word_similar': word}) for field in fields)) for word in words]
+    scores = [
+        Greatest(*(TrigramWordSimilarity(word, field) for field in fields)) if len(fields) > 1
+        else TrigramWordSimilarity(word, fields[0])
+        for word in words
+    ]
+    # word_similarity returns a real, cast so cursor positions survive the round trip through a python float
+    similarity = Cast(reduce(add, scores), FloatField())
+    return queryset.filter(reduce(and_, matches)).annotate(similarity=similarity)
+
+
+def order_by_with_tiebreaker(queryset, sort_option=None):
+    ''' sorts by sort_option then id in the same direction, the order the (field, id) indexes are stored in '''
+    if sort_option is None:
+        return queryset.order_by('id')
+    return queryset.order_by(sort_option, '-id' if sort_option.startswith('-') else 'id')
+
 
 def user_team_retrieve(user: User):
     return get_object_or_404(Team, owner=user)
 
 
+def user_team_stamps(user: User):
+    return Team.objects.filter(owner=user).values_list(*TEAM_STAMP_FIELDS).first()
+
+
+def user_team_provisioning_status(user: User):
+    team_id = Team.objects.filter(owner=user).values_list('id', flat=True).first()
+    if team_id is not None:
+        return {'status': TeamProvisioningStatus.READY, 'team': team_id}
+    if user.team_provisioning_status is None:
+        raise NotFound({'detail': 'user has no team'})
+    return {'status': user.team_provisioning_status, 'team': None}
+
+
 def team_list(filters = {}):
-    return TeamFilter(filters, Team.objects.all()).qs.order_by('id')
+    teams_qs = Team.objects.filter(owner__isnull=False).only(*TEAM_LIST_FIELDS)
+    search = filters.pop('search', None)
+    if search:
+        # the name is citext, its trigram index is on name::text
+        teams_qs = search_by_similarity(teams_qs.annotate(name_text=Cast('name', TextField())), ['name_text'], search)
+        return order_by_with_tiebreaker(TeamFilter(filters, teams_qs).qs, '-similarity')
+    return TeamFilter(filters, teams_qs).qs.order_by('id')
 
 
 def team_retrieve(team_id: int):
-    return get_object_or_404(Team, pk=team_id)
+    return get_object_or_404(Team.objects.filter(owner__isnull=False).select_related('owner'), pk=team_id)
+
+
+def team_stamps(team_id: int):
+    return Team.objects.filter(pk=team_id, owner__isnull=False).values_list(*TEAM_STAMP_FIELDS).first()
 
 
 def team_list_players(team_id: int, filters = {}):
-    team = get_object_or_404(Team, pk=team_id)
-    players_qs = team.players.all()
+    team = get_object_or_404(Team.objects.filter(owner__isnull=False).only('id'), pk=team_id)
+    players_qs = team.players.only(*PLAYER_LIST_FIELDS)
     sort_option = filters.pop('sort_by', None)
-    if sort_option != None:
-        return PlayerFilter(filters, players_qs).qs.order_by(sort_option)
-    return PlayerFilter(filters, players_qs).qs.order_by('id')
+    return order_by_with_tiebreaker(PlayerFilter(filters, players_qs).qs, sort_option)
 
 
 def players_list(filters = {}):
-    players_qs = Player.objects.all()
+    players_qs = Player.objects.filter(pooled=False).only(*PLAYER_LIST_FIELDS)
     sort_option = filters.pop('sort_by', None)
-    if sort_option != None:
-        return PlayerFilter(filters, players_qs).qs.order_by(sort_option)
-    return PlayerFilter(filters, players_qs).qs.order_by('id')
+    search = filters.pop('search', None)
+    if search:
+        players_qs = search_by_similarity(players_qs, ['first_name', 'last_name'], search)
+        sort_option = sort_option or '-similarity'
+    return order_by_with_tiebreaker(PlayerFilter(filters, players_qs).qs, sort_option)
 
 
 def player_retrieve(player_id: int):
-    return get_object_or_404(Player, pk=player_id)
+    return get_object_or_404(Player.objects.filter(pooled=False).select_related('team'), pk=player_id)
+
+
+def player_stamps(player_id: int):
+    return Player.objects.filter(pk=player_id, pooled=False).values_list(*PLAYER_STAMP_FIELDS).first()
 
 
 def active_transfers_list(filters = {}):
-    transfers_qs = Transfer.objects.filter(status=TransferStatus.PENDING)
+    transfers_qs = Transfer.objects.filter(status=TransferStatus.PENDING) \
+        .select_related(*TRANSFER_RELATED).only(*TRANSFER_LIST_FIELDS)
     sort_option = filters.pop('sort_by', None)
-    if sort_option != None:
-        return TransferFilter(filters, transfers_qs).qs.order_by(sort_option)
-    return TransferFilter(filters, transfers_qs).qs.order_by('id')
+    search = filters.pop('search', None)
+    if search:
+        transfers_qs = search_by_similarity(transfers_qs, ['player__first_name', 'player__last_name'], search)
+        sort_option = sort_option or '-similarity'
+    return order_by_with_tiebreaker(TransferFilter(filters, transfers_qs).qs, sort_option)
 
 
 def transfer_retrieve_by_player_id(player_id:int):
     try:
-        transfer = Transfer.objects.get(player_id=player_id, status=TransferStatus.PENDING)
+        transfer = Transfer.objects.select_related(*TRANSFER_RELATED) \
+            .get(player_id=player_id, status=TransferStatus.PENDING)
     except Transfer.DoesNotExist:
         raise NotFound({'detail':'player not found on transfer market'})
-    except Transfer.MultipleObjectsReturned:
-        raise ValidationError({
-            'detail': 'this player has multiple pending transfers on market. contact admin for further assistance'
-            })
     return transfer
+
+
+def transfer_stamps_by_player_id(player_id: int):
+    return Transfer.objects.filter(player_id=player_id, status=TransferStatus.PENDING) \
+        .values_list(*TRANSFER_STAMP_FIELDS).first()
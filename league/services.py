@@ -1,14 +1,20 @@
 import string
-from decimal import Decimal
 from random import randint, choices
 from typing import Optional, Union
 from faker import Faker
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import ValidationError, PermissionDenied
+from league.cache import PLAYERS, TEAMS, TRANSFERS, versions_bump
 from league.constants import TransferStatus, PlayerPosition
-from league.models import Team, Player, Transfer
+from league.events import TRANSFER_COMPLETED, TRANSFER_CREATED, transfer_event_publish
+from league.market_stats import market_stats_record
+from league.models import Team, Player, Transfer, get_default_country
+from league.names import country_locale, locale_faker, random_player_names
+from oscsettings.models import LeagueSettings
+from onlinesoccermanager.money import Money
+from users.constants import TeamProvisioningStatus
 
 User = get_user_model()
 
@@ -16,43 +22,128 @@ NUMBER_OF_GOALKEEPERS = 3
 NUMBER_OF_MIDFIELDERS = 6
 NUMBER_OF_DEFENDERS = 6
 NUMBER_OF_ATTACKERS = 5
+MAX_TEAM_NAME_ATTEMPTS = 5
+# key of the advisory lock held while the team pool is refilled
+TEAM_POOL_LOCK_KEY = 0x7465616d
 
+SQUAD_POSITIONS = (
+    [PlayerPosition.GOALKEEPER] * NUMBER_OF_GOALKEEPERS
+    + [PlayerPosition.DEFENDER] * NUMBER_OF_DEFENDERS
+    + [PlayerPosition.MIDFIELDER] * NUMBER_OF_MIDFIELDERS
+    + [PlayerPosition.ATTACKER] * NUMBER_OF_ATTACKERS
+)
 
-def generate_team_with_players(user: Union[User, int]):
-    if isinstance(user, int):
-        user = User.objects.get(id=user)
-    fake = Faker()
-    team_names_set = set(Team.objects.values_list('name', flat=True))
-    abbrev_size = 10
-    team_name = fake.city() + ' ' + ''.join(choices(string.ascii_uppercase, k=abbrev_size))
 
-    while team_name in team_names_set:
-        abbrev_size += 1
+def team_create_with_unique_name(user: User, fake: Faker, **team_fields) -> Team:
+    '''
+        creates the user's team under a random name, relying on the unique constraint on Team.name
+        instead of loading every existing name. a clash only rolls back the savepoint and retries
+        with a longer abbreviation
+    '''
+    abbrev_size = 10
+    for _ in range(MAX_TEAM_NAME_ATTEMPTS):
         team_name = fake.city() + ' ' + ''.join(choices(string.ascii_uppercase, k=abbrev_size))
+        try:
+            with transaction.atomic():
+                return Team.objects.create(owner=user, name=team_name, **team_fields)
+        except IntegrityError:
+            if not Team.objects.filter(name=team_name).exists():
+                raise
+        abbrev_size += 1
+    raise ValidationError({'detail': 'could not generate a unique team name, try again'})
 
-    team = Team.objects.create(owner=user, name=team_name)
-    players_list = []
 
-    for i in range(20):
-        if 0 <= i < 3:
-            player_position = PlayerPosition.GOALKEEPER
-        elif 3 <= i < 9:
-            player_position = PlayerPosition.DEFENDER
-        elif 9 <= i < 15:
-            player_position = PlayerPosition.MIDFIELDER
-        else:
-            player_position = PlayerPosition.ATTACKER
+@transaction.atomic
+def generate_team_with_players(user: Union[User, int, None]) -> Team:
+    '''
+        builds a team of 20 players for the user, or an unowned team for the pool when user is None
+    '''
+    if isinstance(user, int):
+        user = User.objects.get(id=user)
+    country = get_default_country()
+    player_names = random_player_names(country, len(SQUAD_POSITIONS))
+    players_list = []
 
+    for player_position, (first_name, last_name) in zip(SQUAD_POSITIONS, player_names):
         player = Player(
-            first_name=fake.first_name(),
-            last_name=fake.last_name(),
+            first_name=first_name,
+            last_name=last_name,
             position=player_position,
-            team=team,
-            age=randint(18,40)
+            country=country,
+            age=randint(18,40),
+            pooled=user is None
             )
         players_list.append(player)
 
+    fake = locale_faker(country_locale(country))
+    team = team_create_with_unique_name(
+        user, fake, country=country, value=sum(player.value for player in players_list)
+    )
+    for player in players_list:
+        player.team = team
     Player.objects.bulk_create(players_list)
+    if user is not None:
+        # pooled teams stay out of every listing until they are claimed
+        versions_bump(TEAMS, PLAYERS)
+    return team
+
+
+def team_pool_claim(user: User) -> Optional[Team]:
+    '''
+        hands the oldest pooled team to the user. rows locked by concurrent registrations are
+        skipped rather than waited on. returns None when the pool is empty
+    '''
+    team = Team.objects.select_for_update(skip_locked=True).filter(owner__isnull=True).order_by('id').first()
+    if team is None:
+        return None
+    team.owner = user
+    team.save(update_fields=['owner', 'updated_at'])
+    team.players.update(pooled=False, updated_at=team.updated_at)
+    versions_bump(TEAMS, PLAYERS)
+    return team
+
+
+@transaction.atomic
+def team_provision(user_id: int) -> Team:
+    '''
+        builds the team of a user registered with async team provisioning. the user row is locked
+        so a retried or duplicated task finds the team already there instead of building another
+    '''
+    user = User.objects.select_for_update().get(id=user_id)
+    team = Team.objects.filter(owner=user).first()
+    if team is None:
+        team = team_pool_claim(user) or generate_team_with_players(user)
+    user.team_provisioning_status = TeamProvisioningStatus.READY
+    user.save(update_fields=['team_provisioning_status'])
+    return team
+
+
+def team_provisioning_fail(user_id: int) -> None:
+    User.objects.filter(id=user_id, team__isnull=True).update(team_provisioning_status=TeamProvisioningStatus.FAILED)
+
+
+def team_pool_replenish() -> int:
+    '''
+        tops the pool back up to LeagueSettings.team_pool_size once it drops below the low water mark.
+        every team is committed on its own so registrations can claim them right away. one worker refills
+        at a time and counts the pool under the lock, concurrent calls return 0 instead of overshooting
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [TEAM_POOL_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            return 0
+    try:
+        league_settings = LeagueSettings.load()
+        pool_size = Team.objects.filter(owner__isnull=True).count()
+        if pool_size >= league_settings.team_pool_low_water_mark:
+            return 0
+        missing = max(league_settings.team_pool_size - pool_size, 0)
+        for _ in range(missing):
+            generate_team_with_players(None)
+        return missing
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [TEAM_POOL_LOCK_KEY])
 
 @transaction.atomic
 def team_update(team: Team, user: User, name:Optional[str] = None, country: Optional[str] = None) -> Player:
@@ -65,7 +156,9 @@ def team_update(team: Team, user: User, name:Optional[str] = None, country: Opti
         team.name = name
     if country:
         team.country = country
-    team.save()
+    # only the edited columns, a full save could undo budget or value changes of a concurrent purchase
+    team.save(update_fields=['name', 'country', 'updated_at'])
+    versions_bump(TEAMS)
     return team
 
 
@@ -87,56 +180,79 @@ def player_update(
         player.last_name = last_name
     if country:
         player.country = country
-    player.save()
+    player.save(update_fields=['first_name', 'last_name', 'country', 'updated_at'])
+    versions_bump(PLAYERS)
     return player
 
 
 @transaction.atomic
-def player_transfer_create(player_id: int, price: Decimal, user: User):
-    player = get_object_or_404(Player, pk=player_id)
+def player_transfer_create(player_id: int, price: Money, user: User):
+    # same first lock as player_buy, a player cannot be listed while it is being sold
+    player = get_object_or_404(Player.objects.select_for_update(), pk=player_id)
     if player.team.owner != user:
         raise PermissionDenied({'detail': 'Only team owner of team player belongs to can transfer player'})
 
+    # league_transfer_one_pending_per_player enforces this in the database as well
     if Transfer.objects.filter(player=player, status=TransferStatus.PENDING).exists():
         raise ValidationError({'detail': 'player is already on the transfer list'})
     seller = user.team
     transfer = Transfer.objects.create(player=player, seller=seller, price=price)
+    versions_bump(TRANSFERS)
+    transfer_event_publish(TRANSFER_CREATED, transfer)
 
     return transfer
 
 
-@transaction.atomic
-def player_buy(player_id, user: User):
-    if not user.is_team_owner:
-        raise PermissionDenied({'detail': 'only users who own a team can buy a player'})
-    player = get_object_or_404(Player, pk=player_id)
-    try:
-        transfer = Transfer.objects.get(player=player, status=TransferStatus.PENDING)
-    except Transfer.DoesNotExist:
-        raise ValidationError({'detail': 'this player is not available for transfer'})
-    except Transfer.MultipleObjectsReturned:
-        raise ValidationError({
-            'detail': 'this player has multiple pending transfers on market. contact admin for further assistance'
-            })
-    buyer = user.team
-    seller = player.team
+def transfer_complete(transfer: Transfer, player: Player, buyer_team_id: int) -> Transfer:
+    '''
+        moves the player and the money of a pending transfer. the caller must hold the player and transfer
+        row locks. both teams are then locked in id order, so concurrent buys never wait on each other in a cycle
+    '''
+    teams = Team.objects.select_for_update().filter(id__in={player.team_id, buyer_team_id}).order_by('id')
+    teams = {team.id: team for team in teams}
+    seller = teams[player.team_id]
+    buyer = teams[buyer_team_id]
     if seller == buyer:
         raise PermissionDenied({'detail': 'team selling a player cannot buy its own player'})
     if transfer.price > buyer.budget:
         raise ValidationError({'detail': 'you do not have enough funds to buy this player'})
 
-    player_value_markup = Decimal(1 + (randint(10, 100) / 100))
     seller.budget += transfer.price
+    seller.value -= player.value
     buyer.budget -= transfer.price
-    player.value *= player_value_markup
+    # a markup of 10 to 100 percent, in whole cents
+    transfer.markup = randint(10, 100)
+    player.value = player.value.scale(100 + transfer.markup, 100)
+    buyer.value += player.value
     player.team = buyer
     transfer.status = TransferStatus.COMPLETE
+    transfer.seller = seller
     transfer.buyer = buyer
 
-    seller.save()
-    buyer.save()
-    player.save()
-    transfer.save()
+    seller.save(update_fields=['budget', 'value', 'updated_at'])
+    buyer.save(update_fields=['budget', 'value', 'updated_at'])
+    player.save(update_fields=['team', 'value', 'updated_at'])
+    transfer.save(update_fields=['status', 'seller', 'buyer', 'markup', 'updated_at'])
+    transfer.player = player
+    # recorded on commit ahead of the second bump, so cached stats are rebuilt with the transfer in them
+    market_stats_record(transfer, player)
+    versions_bump(TEAMS, PLAYERS, TRANSFERS)
+    transfer_event_publish(TRANSFER_COMPLETED, transfer)
+
+    return transfer
+
+
+@transaction.atomic
+def player_buy(player_id, user: User):
+    if not user.is_team_owner:
+        raise PermissionDenied({'detail': 'only users who own a team can buy a player'})
+    # lock order for every purchase: player, then its pending transfer, then both teams by id
+    player = get_object_or_404(Player.objects.select_for_update(), pk=player_id)
+    try:
+        transfer = Transfer.objects.select_for_update().get(player=player, status=TransferStatus.PENDING)
+    except Transfer.DoesNotExist:
+        raise ValidationError({'detail': 'this player is not available for transfer'})
+    transfer_complete(transfer, player, user.team.id)
 
     return player
 
@@ -145,29 +261,12 @@ def player_buy(player_id, user: User):
 def buy_player_complete_transfer(transfer_id, user: User):
     if not user.is_team_owner:
         raise PermissionDenied({'detail': 'only users who own a team can buy a player'})
-    buyer = user.team
-    transfer = get_object_or_404(Transfer, pk=transfer_id)
-    seller = transfer.seller
-    player = transfer.player
-    if seller == buyer:
-        raise PermissionDenied({'detail': 'team selling a player cannot buy its own player'})
+    player_id = get_object_or_404(Transfer.objects.only('player'), pk=transfer_id).player_id
+    player = get_object_or_404(Player.objects.select_for_update(), pk=player_id)
+    transfer = get_object_or_404(Transfer.objects.select_for_update(), pk=transfer_id)
     if transfer.status == TransferStatus.COMPLETE:
         raise ValidationError({'detail': 'provided transfer has already been completed'})
-    if transfer.price > buyer.budget:
-        raise ValidationError({'detail': 'you do not have enough funds to buy this player'})
-
-    player_value_markup = randint(10, 100)
-
-    seller.budget += transfer.price
-    buyer.budget -= transfer.price
-    player.value += (player.value * Decimal((player_value_markup / 100)))
-    player.team = buyer
-    transfer.status = TransferStatus.COMPLETE
-    transfer.buyer = buyer
-
-    seller.save()
-    buyer.save()
-    player.save()
-    transfer.save()
+    if transfer.player_id != player.id:
+        raise ValidationError({'detail': 'this player is not available for transfer'})
 
-    return transfer
+    return transfer_complete(transfer, player, user.team.id)
@@ -0,0 +1,13 @@
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from league.cache import PLAYERS, TEAMS, versions_bump
+from league.models import Team, Player
+
+
+@receiver(post_delete, sender=Player)
+def subtract_player_value_from_team(sender, instance: Player, **kwargs):
+    # runs inside the deleting transaction, a no-op if the team itself is being deleted
+    Team.objects.filter(pk=instance.team_id).update(value=F('value') - instance.value, updated_at=timezone.now())
+    versions_bump(PLAYERS, TEAMS)
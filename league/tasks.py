@@ -1,6 +1,46 @@
 from celery import shared_task
-from league.services import generate_team_with_players
+from django.db import DatabaseError
+from league.market_stats import market_stats_backfill, market_stats_compact
+from league.matches import round_play_next
+from league.season import season_rollover
+from league.services import team_provision, team_provisioning_fail, team_pool_replenish
+
+@shared_task(bind=True, max_retries=5)
+def create_team_with_players_on_user_registration(self, user):
+    try:
+        team_provision(user)
+    except DatabaseError as exc:
+        if self.request.retries >= self.max_retries:
+            team_provisioning_fail(user)
+            raise
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+    except Exception:
+        # anything but a database error fails the same way on a retry
+        team_provisioning_fail(user)
+        raise
+
+
+@shared_task()
+def replenish_team_pool():
+    return team_pool_replenish()
+
+
+@shared_task()
+def backfill_market_stats():
+    return market_stats_backfill()
+
+
+@shared_task()
+def compact_market_stats():
+    return market_stats_compact()
+
+
+@shared_task()
+def rollover_season(market_days=365):
+    rollover = season_rollover(market_days)
+    return rollover._asdict() if rollover is not None else None
+
 
 @shared_task()
-def create_team_with_players_on_user_registration(user):
-    generate_team_with_players(user)
+def play_next_round():
+    return round_play_next()._asdict()
@@ -1,14 +1,21 @@
+import json
+import re
 import string
-from decimal import Decimal
 from random import randint, choices
 
-from django.test import TestCase
+from channels.db import database_sync_to_async
+from channels.testing import HttpCommunicator
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django_countries.fields import Country
 
 from league.constants import TransferStatus
 from league.models import Team, Player, Transfer
 from league.services import generate_team_with_players
+from onlinesoccermanager.asgi import application
+from onlinesoccermanager.money import Money
+from onlinesoccermanager.pagination import LinkHeaderPagination
 
 User = get_user_model()
 
@@ -42,13 +49,14 @@ class MyTeamRetrieveApiTestCase(TestCase):
         self.assertEqual(response_data['id'], self.user.team.id)
         self.assertEqual(response_data['name'], self.user.team.name)
         self.assertEqual(response_data['country'], self.user.team.country.name)
-        self.assertEqual(Decimal(response_data['budget']), self.user.team.budget)
-        self.assertEqual(Decimal(response_data['value']), self.user.team.value)
+        self.assertEqual(Money.from_decimal(response_data['budget']), self.user.team.budget)
+        self.assertEqual(Money.from_decimal(response_data['value']), self.user.team.value)
 
 
 class ListTeamsApiTestCase(TestCase):
     def setUp(self) -> None:
         super().setUp()
+        cache.clear()
         self.team_url = f'/api/league/teams/'
         self.user = User.objects.create_user(
             email='johndoe@onlinesoccermanager.com',
@@ -67,10 +75,18 @@ class ListTeamsApiTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.json(), list)
 
+    def test_list_teams_search(self) -> None:
+        team = Team.objects.create(name='Manchester United', owner=self.user)
+        other_user = User.objects.create_user(email='notme@onlinesoccermanager.com', password='barbarfoo')
+        Team.objects.create(name='Manchester City', owner=other_user)
+        response = self.client.get(f'{self.team_url}?search=united manchster', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual([team['id'] for team in response.json()], [team.id])
+
 
 class ListPlayersApiTestCase(TestCase):
     def setUp(self) -> None:
         super().setUp()
+        cache.clear()
         self.team_url = f'/api/league/players/'
         self.user = User.objects.create_user(
             email='johndoe@onlinesoccermanager.com',
@@ -89,10 +105,135 @@ class ListPlayersApiTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.json(), list)
 
+    def test_list_players_default_page_size(self) -> None:
+        generate_team_with_players(self.user)
+        while Player.objects.count() <= LinkHeaderPagination.page_size:
+            Player.objects.create(team=self.user.team, first_name='first', last_name='last', age=22)
+        response = self.client.get(self.team_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), LinkHeaderPagination.page_size)
+        self.assertIn('rel="next"', response['Link'])
+
+    def test_list_players_ndjson_stream(self) -> None:
+        generate_team_with_players(self.user)
+        response = self.client.get(f'{self.team_url}?stream=ndjson', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], list(Player.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_list_players_age_and_value_range(self) -> None:
+        team = generate_team_with_players(self.user)
+        team.players.update(age=30, value=Money.from_decimal(1000000))
+        young, cheap = team.players.order_by('id')[:2]
+        Player.objects.filter(pk=young.pk).update(age=19)
+        Player.objects.filter(pk=cheap.pk).update(value=Money.from_decimal(500000))
+
+        response = self.client.get(f'{self.team_url}?max_age=20', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual([player['id'] for player in response.json()], [young.id])
+        response = self.client.get(
+            f'{self.team_url}?min_age=20&max_value=999999.99', HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual([player['id'] for player in response.json()], [cheap.id])
+        response = self.client.get(
+            f'/api/league/teams/{team.id}/players/?min_value=1000000&sort_by=-age', HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(len(response.json()), 19)
+
+    def test_list_players_invalid_range(self) -> None:
+        response = self.client.get(f'{self.team_url}?min_age=-1', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_players_search(self) -> None:
+        team = generate_team_with_players(self.user)
+        messi, ronaldo, other = team.players.order_by('id')[:3]
+        Player.objects.filter(pk=messi.pk).update(first_name='Lionel', last_name='Messi')
+        Player.objects.filter(pk=ronaldo.pk).update(first_name='Cristiano', last_name='Ronaldo')
+        Player.objects.filter(pk=other.pk).update(first_name='Lionel', last_name='Scaloni')
+
+        response = self.client.get(f'{self.team_url}?search=messi', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual([player['id'] for player in response.json()], [messi.id])
+        response = self.client.get(f'{self.team_url}?search=lionel mesi', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual([player['id'] for player in response.json()], [messi.id])
+        response = self.client.get(f'{self.team_url}?search=Lionel', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual({player['id'] for player in response.json()}, {messi.id, other.id})
+
+
+class ListPlayersCursorPaginationApiTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.players_url = f'/api/league/players/'
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        generate_team_with_players(self.user)
+        self.auth_header = f'Bearer {self.user.token}'
+
+    def get_links(self, response) -> dict:
+        return {rel: url for url, rel in re.findall(r'<([^>]+)>; rel="(\w+)"', response.get('Link', ''))}
+
+    def test_list_players_cursor_pagination(self) -> None:
+        expected_ids = list(Player.objects.order_by('-age', '-id').values_list('id', flat=True))
+        url = f'{self.players_url}?cursor=&page_size=7&sort_by=-age'
+        seen_ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.get('Link', ''))
+            seen_ids.extend(player['id'] for player in response.json())
+            url = self.get_links(response).get('next')
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen_ids, expected_ids)
+
+        prev_url = self.get_links(response)['prev']
+        response = self.client.get(prev_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual([player['id'] for player in response.json()], expected_ids[7:14])
+
+    def test_list_players_invalid_cursor(self) -> None:
+        response = self.client.get(f'{self.players_url}?cursor=notacursor', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 404)
+        # well formed cursors holding values the sort fields do not accept
+        for sort_by, position in (('age', ['abc', 1]), ('value', [1.5, 'x']), ('value', [[1], 1])):
+            cursor = LinkHeaderPagination().encode_cursor(position)
+            response = self.client.get(
+                f'{self.players_url}?cursor={cursor}&sort_by={sort_by}', HTTP_AUTHORIZATION=self.auth_header
+            )
+            self.assertEqual(response.status_code, 404)
+
+
+# a chunk smaller than the table, so the stream spans several queries
+@override_settings(STREAM_CHUNK_SIZE=7)
+class ListPlayersStreamAsgiTestCase(TransactionTestCase):
+    # the views run on another thread than the test, so the data has to be committed
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(email='johndoe@onlinesoccermanager.com', password='barbarfoo')
+        generate_team_with_players(self.user)
+        generate_team_with_players(User.objects.create_user(email='notme@onlinesoccermanager.com'))
+        self.headers = [(b'authorization', f'Bearer {self.user.token}'.encode())]
+
+    async def test_list_players_ndjson_stream(self) -> None:
+        communicator = HttpCommunicator(
+            application, 'GET', '/api/league/players/?stream=ndjson&sort_by=-age', headers=self.headers
+        )
+        response = await communicator.get_response(timeout=10)
+        self.assertEqual(response['status'], 200)
+        rows = [json.loads(line) for line in response['body'].splitlines()]
+        players = Player.objects.order_by('-age', '-id').values_list('id', flat=True)
+        self.assertEqual([row['id'] for row in rows], await database_sync_to_async(list)(players))
+
 
 class ListTeamPlayersApiTestCase(TestCase):
     def setUp(self) -> None:
         super().setUp()
+        cache.clear()
         self.user = User.objects.create_user(
             email='johndoe@onlinesoccermanager.com',
             first_name='John',
@@ -135,8 +276,8 @@ class TeamUpdateRetrieveApiTestCase(TestCase):
         self.assertEqual(response_data['id'], self.team.id)
         self.assertEqual(response_data['name'], self.team.name)
         self.assertEqual(response_data['country'], self.team.country.name)
-        self.assertEqual(Decimal(response_data['budget']), self.team.budget)
-        self.assertEqual(Decimal(response_data['value']), self.team.value)
+        self.assertEqual(Money.from_decimal(response_data['budget']), self.team.budget)
+        self.assertEqual(Money.from_decimal(response_data['value']), self.team.value)
 
     def test_retrieve_team_non_authenticated(self) -> None:
         response = self.client.get(self.team_url)
@@ -261,8 +402,8 @@ class PlayerUpdateRetrieveApiTestCase(TestCase):
         self.assertEqual(response_data['first_name'], self.player.first_name)
         self.assertEqual(response_data['last_name'], self.player.last_name)
         self.assertEqual(response_data['country'], self.player.country.name)
-        self.assertEqual(Decimal(response_data['age']), self.player.age)
-        self.assertEqual(Decimal(response_data['value']), self.player.value)
+        self.assertEqual(response_data['age'], self.player.age)
+        self.assertEqual(Money.from_decimal(response_data['value']), self.player.value)
         self.assertEqual(response_data['team'], self.player.team.id)
         self.assertEqual(response_data['team_name'], self.player.team.name)
 
@@ -382,7 +523,7 @@ class PlayerTransferApiTestCase(TestCase):
         response = self.client.post(self.player_transfer_url, data=transfer_data, HTTP_AUTHORIZATION=self.auth_header)
         self.assertEqual(response.status_code, 201)
         response_data = response.json()
-        self.assertEqual(Decimal(response_data['price']), Decimal(price))
+        self.assertEqual(Money.from_decimal(response_data['price']), Money.from_decimal(price))
         self.assertEqual(response_data['status'], TransferStatus.PENDING)
         self.assertEqual(response_data['player'], self.player.id)
         self.assertEqual(response_data['seller'], self.user.team.id)
@@ -390,7 +531,7 @@ class PlayerTransferApiTestCase(TestCase):
 
     def test_player_transfer_with_pending_transfer(self) -> None:
         price = randint(100000, 3000000)
-        Transfer.objects.create(player=self.player, price=price)
+        Transfer.objects.create(player=self.player, price=Money.from_decimal(price))
         transfer_data = {'price': randint(100000, 3000000)}
         response = self.client.post(self.player_transfer_url, data=transfer_data, HTTP_AUTHORIZATION=self.auth_header)
         self.assertEqual(response.status_code, 400)
@@ -408,6 +549,7 @@ class PlayerTransferApiTestCase(TestCase):
 class ListPendingTransfersApiTestCase(TestCase):
     def setUp(self) -> None:
         super().setUp()
+        cache.clear()
         self.user = User.objects.create_user(
             email='johndoe@onlinesoccermanager.com',
             first_name='John',
@@ -426,6 +568,26 @@ class ListPendingTransfersApiTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.json(), list)
 
+    def test_list_pending_transfers_search(self) -> None:
+        team = generate_team_with_players(self.user)
+        players = list(team.players.order_by('id')[:12])
+        for index, player in enumerate(players):
+            Player.objects.filter(pk=player.pk).update(first_name='Kylian', last_name=f'Mbappe{index}')
+            Transfer.objects.create(player=player, price=Money.from_decimal(100000))
+        Player.objects.filter(pk=players[0].pk).update(first_name='Erling', last_name='Haaland')
+
+        response = self.client.get(f'{self.market_url}?search=haland', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual([transfer['player'] for transfer in response.json()], [players[0].id])
+
+        url = f'{self.market_url}?search=kylian&cursor=&page_size=5'
+        seen_ids = []
+        while url:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+            seen_ids.extend(transfer['player'] for transfer in response.json())
+            url = re.search(r'<([^>]+)>; rel="next"', response.get('Link', ''))
+            url = url.group(1) if url else None
+        self.assertCountEqual(seen_ids, [player.id for player in players[1:]])
+
 
 class TransferRetrieveByPlayerIDApiTestCase(TestCase):
     def setUp(self) -> None:
@@ -461,7 +623,7 @@ class TransferRetrieveByPlayerIDApiTestCase(TestCase):
         self.assertEqual(response.status_code, 404)
 
     def test_retrieve_pending_transfer_by_player_by_team_owner(self) -> None:
-        transfer = Transfer.objects.create(player=self.player, seller=self.team, price=2000000)
+        transfer = Transfer.objects.create(player=self.player, seller=self.team, price=Money.from_decimal(2000000))
         response = self.client.get(self.transfer_url, HTTP_AUTHORIZATION=self.auth_header)
         self.assertEqual(response.status_code, 200)
         response_data = response.json()
@@ -472,8 +634,8 @@ class TransferRetrieveByPlayerIDApiTestCase(TestCase):
         self.assertEqual(response_data['team'], self.team.id)
         self.assertEqual(response_data['team_name'], self.team.name)
         self.assertEqual(response_data['status'], TransferStatus.PENDING)
-        self.assertEqual(Decimal(response_data['current_value']), self.player.value)
-        self.assertEqual(Decimal(response_data['price']), transfer.price)
+        self.assertEqual(Money.from_decimal(response_data['current_value']), self.player.value)
+        self.assertEqual(Money.from_decimal(response_data['price']), transfer.price)
 
 
 class PlayerBuyApiTestCase(TestCase):
@@ -489,7 +651,7 @@ class PlayerBuyApiTestCase(TestCase):
         generate_team_with_players(self.user)
         self.player = Player.objects.first()
         price = randint(100000,2000000)
-        self.transfer = Transfer.objects.create(player=self.player, price=price)
+        self.transfer = Transfer.objects.create(player=self.player, price=Money.from_decimal(price))
         self.player_buy_url = f'{self.base_url}{self.player.id}/buy/'
 
     def test_player_buy_unauthenticated_user(self) -> None:
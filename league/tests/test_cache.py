@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from league.cache import TEAMS, VersionedResponseCacheMixin, versions_bump, versions_get
+from league.models import Team
+from league.services import generate_team_with_players, team_update
+
+User = get_user_model()
+
+
+class TeamsCacheView(VersionedResponseCacheMixin):
+    cache_entities = (TEAMS,)
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=60)
+class VersionedResponseCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.team = generate_team_with_players(self.user)
+        self.teams_url = '/api/league/teams/'
+        self.auth_header = f'Bearer {self.user.token}'
+
+    def get_team_names(self, url: str) -> list:
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        return [team['name'] for team in response.json()]
+
+    def test_list_response_is_cached(self) -> None:
+        self.assertEqual(self.get_team_names(self.teams_url), [self.team.name])
+        # a write that bypasses league.services keeps the cached response
+        Team.objects.filter(pk=self.team.pk).update(name='Renamed Behind The Cache')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_team_names(self.teams_url), [self.team.name])
+        self.assertEqual(self.get_team_names(f'{self.teams_url}?page_size=10'), ['Renamed Behind The Cache'])
+
+    def test_service_write_invalidates_response(self) -> None:
+        self.get_team_names(self.teams_url)
+        team_update(self.team, self.user, name='Renamed Through The Service')
+        self.assertEqual(self.get_team_names(self.teams_url), ['Renamed Through The Service'])
+
+    def test_pagination_links_are_cached(self) -> None:
+        for i in range(3):
+            generate_team_with_players(User.objects.create_user(email=f'user{i}@onlinesoccermanager.com'))
+        url = f'{self.teams_url}?page_size=2'
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+        cached_response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertIn('rel="next"', response['Link'])
+        self.assertEqual(cached_response['Link'], response['Link'])
+        self.assertEqual(cached_response.json(), response.json())
+
+    def test_versions_bump(self) -> None:
+        version, = versions_get([TEAMS])
+        versions_bump(TEAMS)
+        self.assertGreater(versions_get([TEAMS])[0], version)
+        cache.clear()
+        self.assertNotEqual(versions_get([TEAMS])[0], version + 1)
+
+    def test_concurrent_miss_does_not_wait(self) -> None:
+        view = TeamsCacheView()
+        request = Request(APIRequestFactory().get(self.teams_url))
+        key = view.get_response_cache_key(request)
+        # another worker holds the lock while it rebuilds the response
+        cache.add(f'{key}:lock', 1)
+
+        with patch('league.cache.time.sleep') as sleep:
+            response = view.get_cached_response(request, lambda: Response(['built here']))
+        self.assertEqual(response.data, ['built here'])
+        self.assertTrue(response.has_header('ETag'))
+        sleep.assert_not_called()
+        # storing the response is left to the lock holder
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.get(f'{key}:lock'), 1)
+
+    @override_settings(RESPONSE_CACHE_SECONDS=0)
+    def test_disabled_cache(self) -> None:
+        self.get_team_names(self.teams_url)
+        Team.objects.filter(pk=self.team.pk).update(name='Renamed Behind The Cache')
+        self.assertEqual(self.get_team_names(self.teams_url), ['Renamed Behind The Cache'])
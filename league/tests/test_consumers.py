@@ -0,0 +1,88 @@
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from league.consumers import CLOSE_INVALID_FILTER, CLOSE_UNAUTHENTICATED
+from league.constants import PlayerPosition
+from league.events import TRANSFER_COMPLETED, TRANSFER_CREATED
+from league.services import generate_team_with_players, player_buy, player_transfer_create
+from onlinesoccermanager.asgi import application
+from onlinesoccermanager.money import Money
+
+User = get_user_model()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class MarketConsumerTestCase(TransactionTestCase):
+    # consumers reach the database from other threads, so the data has to be committed
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.other_user = User.objects.create_user(
+            email='notme@onlinesoccermanager.com',
+            first_name='Not',
+            last_name='Me',
+            password='barbarfoo'
+        )
+        self.team = generate_team_with_players(self.user)
+        self.other_team = generate_team_with_players(self.other_user)
+        self.attacker = self.team.players.filter(position=PlayerPosition.ATTACKER).first()
+        self.goalkeeper = self.team.players.filter(position=PlayerPosition.GOALKEEPER).first()
+        self.token = self.other_user.token
+
+    def get_communicator(self, query: str) -> WebsocketCommunicator:
+        return WebsocketCommunicator(application, f'/ws/league/market/?token={self.token}&{query}')
+
+    def list_player(self, player) -> None:
+        player_transfer_create(player.id, price=Money.from_decimal(100000), user=self.user)
+
+    def buy_player(self, player) -> None:
+        player_buy(player.id, user=self.other_user)
+
+    async def test_unauthenticated(self) -> None:
+        communicator = WebsocketCommunicator(application, '/ws/league/market/?token=notatoken')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, CLOSE_UNAUTHENTICATED)
+
+    async def test_invalid_filter(self) -> None:
+        connected, code = await self.get_communicator('position=striker').connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, CLOSE_INVALID_FILTER)
+
+    async def test_transfer_events(self) -> None:
+        communicator = self.get_communicator('')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await database_sync_to_async(self.list_player)(self.attacker)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['event'], TRANSFER_CREATED)
+        self.assertEqual(message['transfer']['player'], self.attacker.id)
+        self.assertEqual(message['transfer']['seller'], self.team.id)
+        self.assertEqual(message['transfer']['price'], '100000.00')
+        self.assertIsNone(message['transfer']['buyer'])
+
+        await database_sync_to_async(self.buy_player)(self.attacker)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['event'], TRANSFER_COMPLETED)
+        self.assertEqual(message['transfer']['buyer'], self.other_team.id)
+        await communicator.disconnect()
+
+    async def test_filtered_transfer_events(self) -> None:
+        communicator = self.get_communicator(f'position=attacker&seller={self.team.id}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await database_sync_to_async(self.list_player)(self.goalkeeper)
+        await database_sync_to_async(self.list_player)(self.attacker)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['transfer']['player'], self.attacker.id)
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from league.models import Team
+from league.services import generate_team_with_players, player_transfer_create, team_update
+from onlinesoccermanager.money import Money
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=60)
+class ConditionalGetTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.team = generate_team_with_players(self.user)
+        self.player = self.team.players.first()
+        self.auth_header = f'Bearer {self.user.token}'
+
+    def get(self, url: str, etag: str = None):
+        headers = {'HTTP_AUTHORIZATION': self.auth_header}
+        if etag is not None:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(url, **headers)
+
+    def assertNotModified(self, url: str, etag: str, num_queries: int, if_none_match: str = None) -> None:
+        with self.assertNumQueries(num_queries):
+            response = self.get(url, if_none_match or etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_not_modified(self) -> None:
+        player_transfer_create(self.player.id, price=Money.from_decimal(100000), user=self.user)
+        urls = (
+            '/api/league/my_team/',
+            f'/api/league/teams/{self.team.id}/',
+            f'/api/league/players/{self.player.id}/',
+            f'/api/league/market/{self.player.id}/',
+        )
+        for url in urls:
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            # the user behind the token and the version stamps, the row itself is never loaded
+            self.assertNotModified(url, response['ETag'], 2)
+            self.assertNotModified(url, response['ETag'], 2, f'"other", W/{response["ETag"]}')
+
+    def test_detail_modified(self) -> None:
+        team_url = f'/api/league/teams/{self.team.id}/'
+        player_url = f'/api/league/players/{self.player.id}/'
+        team_etag = self.get(team_url)['ETag']
+        player_etag = self.get(player_url)['ETag']
+
+        team_update(self.team, self.user, name='Renamed')
+        response = self.get(team_url, team_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Renamed')
+        self.assertNotEqual(response['ETag'], team_etag)
+        # the player response shows the name of the team
+        response = self.get(player_url, player_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['team_name'], 'Renamed')
+
+    def test_patch_etag(self) -> None:
+        url = f'/api/league/teams/{self.team.id}/'
+        response = self.client.patch(
+            url, {'name': 'Renamed'}, content_type='application/json', HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotModified(url, response['ETag'], 2)
+
+    def test_missing_detail(self) -> None:
+        response = self.get(f'/api/league/players/{self.player.id}/', '*')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.get('/api/league/market/0/', '*').status_code, 404)
+
+    def test_list_not_modified(self) -> None:
+        url = '/api/league/teams/'
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        # served from the response cache, only the user behind the token is read
+        self.assertNotModified(url, response['ETag'], 1)
+
+        team_update(self.team, self.user, name='Renamed')
+        modified_response = self.get(url, response['ETag'])
+        self.assertEqual(modified_response.status_code, 200)
+        self.assertNotEqual(modified_response['ETag'], response['ETag'])
+
+    def test_list_etag_follows_content(self) -> None:
+        url = '/api/league/teams/'
+        etag = self.get(url)['ETag']
+        # a write that bypasses league.services leaves the cached response and its ETag in place
+        Team.objects.filter(pk=self.team.pk).update(name='Renamed Behind The Cache')
+        self.assertNotModified(url, etag, 1)
+        with self.settings(RESPONSE_CACHE_SECONDS=0):
+            response = self.get(url, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotModified(url, response['ETag'], 3)
@@ -0,0 +1,136 @@
+import csv
+import gzip
+import io
+import json
+
+from channels.testing import HttpCommunicator
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from league.constants import PlayerPosition, TransferStatus
+from league.models import Player, Team, Transfer
+from league.services import generate_team_with_players
+from onlinesoccermanager.asgi import application
+from onlinesoccermanager.money import Money
+
+User = get_user_model()
+
+
+# a chunk smaller than the tables, so the export spans several round trips
+@override_settings(STREAM_CHUNK_SIZE=7)
+class ExportApiTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo',
+            is_staff=True
+        )
+        self.team = generate_team_with_players(self.user)
+        self.other_team = generate_team_with_players(User.objects.create_user(email='notme@onlinesoccermanager.com'))
+        player = self.team.players.first()
+        completed = Transfer.objects.create(player=player, price=Money.from_decimal('1500000.50'))
+        Transfer.objects.filter(pk=completed.pk).update(buyer=self.other_team, status=TransferStatus.COMPLETE)
+        Transfer.objects.create(player=player, price=Money.from_decimal(2000000))
+        self.auth_header = f'Bearer {self.user.token}'
+
+    def export(self, url: str, **headers):
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_export_non_authenticated(self) -> None:
+        self.assertEqual(self.client.get('/api/league/export/players/').status_code, 401)
+
+    def test_export_non_staff(self) -> None:
+        auth_header = f'Bearer {self.other_team.owner.token}'
+        for name in ('players', 'teams', 'transfers'):
+            response = self.client.get(f'/api/league/export/{name}/', HTTP_AUTHORIZATION=auth_header)
+            self.assertEqual(response.status_code, 403)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_export_stateless_authentication(self) -> None:
+        self.export('/api/league/export/teams/')
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_export_stateless_authentication_demoted_staff(self) -> None:
+        self.export('/api/league/export/teams/')
+        # the token still claims staff status, the cached token state is dropped on save
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.get('/api/league/export/teams/', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_players_csv(self) -> None:
+        response, content = self.export('/api/league/export/players/')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="players.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([int(row['id']) for row in rows], list(Player.objects.order_by('id').values_list('id', flat=True)))
+        player = Player.objects.order_by('id').first()
+        self.assertEqual(rows[0]['value'], str(player.value))
+        self.assertEqual(rows[0]['team'], str(player.team_id))
+        self.assertEqual(rows[0]['updated_at'], player.updated_at.isoformat())
+
+    def test_export_players_filtered_ndjson(self) -> None:
+        response, content = self.export(
+            f'/api/league/export/players/?format=ndjson&position=attacker&team={self.team.id}&min_value=1000000'
+        )
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        expected = self.team.players.filter(position=PlayerPosition.ATTACKER).order_by('id')
+        self.assertEqual([row['id'] for row in rows], [player.id for player in expected])
+        self.assertEqual(rows[0]['value'], '1000000.00')
+
+    def test_export_transfer_history(self) -> None:
+        _, content = self.export(f'/api/league/export/transfers/?format=ndjson&buyer={self.other_team.id}')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['price'], '1500000.50')
+        self.assertEqual(rows[0]['status'], TransferStatus.COMPLETE)
+        _, content = self.export('/api/league/export/transfers/')
+        self.assertEqual(len(content.decode().splitlines()), 3)
+
+    def test_export_gzip(self) -> None:
+        response, content = self.export('/api/league/export/teams/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(content).decode())))
+        self.assertEqual(len(rows), Team.objects.count())
+        self.assertEqual(rows[0]['budget'], str(Team.objects.order_by('id').first().budget))
+
+    def test_export_invalid_parameters(self) -> None:
+        for query in ('format=xml', 'min_age=old', 'position=striker'):
+            response = self.client.get(f'/api/league/export/players/?{query}', HTTP_AUTHORIZATION=self.auth_header)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_export_command(self) -> None:
+        out = io.StringIO()
+        call_command('export_league', 'teams', '--format', 'ndjson', '--filter', 'country=KE',
+                     '--output', '/dev/null', stderr=out)
+        self.assertIn('exported teams', out.getvalue())
+
+
+@override_settings(STREAM_CHUNK_SIZE=7)
+class ExportAsgiTestCase(TransactionTestCase):
+    # the views run on another thread than the test, so the data has to be committed
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com', password='barbarfoo', is_staff=True
+        )
+        generate_team_with_players(self.user)
+        self.headers = [(b'authorization', f'Bearer {self.user.token}'.encode()), (b'accept-encoding', b'gzip')]
+
+    async def test_export_players_gzip(self) -> None:
+        communicator = HttpCommunicator(application, 'GET', '/api/league/export/players/', headers=self.headers)
+        response = await communicator.get_response(timeout=10)
+        self.assertEqual(response['status'], 200)
+        self.assertIn((b'Content-Encoding', b'gzip'), response['headers'])
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(response['body']).decode())))
+        self.assertEqual(len(rows), 20)
+        self.assertEqual([int(row['id']) for row in rows], sorted(int(row['id']) for row in rows))
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from league.cache import TRANSFERS, versions_get
+from league.constants import PlayerPosition, StatsGranularity
+from league.market_stats import (
+    market_stats_backfill, market_stats_compact, price_bin, price_bin_bounds, price_percentiles
+)
+from league.models import MarketStats, Transfer
+from league.services import generate_team_with_players, player_buy
+from onlinesoccermanager.money import Money
+
+User = get_user_model()
+
+
+class PriceBinTestCase(SimpleTestCase):
+    def test_bins_cover_prices(self) -> None:
+        for price in (1, 2, 99, 100, 12345, 10 ** 8, 10 ** 15):
+            lower, upper = price_bin_bounds(price_bin(price))
+            self.assertLessEqual(lower, price)
+            self.assertLess(price, upper)
+            self.assertLessEqual(upper / lower, 2 ** (1 / 16) + 0.01 if price > 100 else 2)
+
+    def test_percentiles_estimate(self) -> None:
+        prices = [Money.from_decimal(amount) for amount in range(1000, 101000, 1000)]
+        bins = {}
+        for price in prices:
+            bins[price_bin(price)] = bins.get(price_bin(price), 0) + 1
+        percentiles = price_percentiles(sorted(bins.items()), len(prices))
+        for name, exact in (('p10', 10000), ('p50', 50000), ('p90', 90000)):
+            self.assertAlmostEqual(percentiles[name].to_decimal() / exact, 1, delta=0.045)
+
+
+class MarketStatsTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.seller = User.objects.create_user(email='johndoe@onlinesoccermanager.com', password='barbarfoo')
+        self.buyer = User.objects.create_user(email='notme@onlinesoccermanager.com', password='barbarfoo')
+        self.team = generate_team_with_players(self.seller)
+        generate_team_with_players(self.buyer)
+        self.auth_header = f'Bearer {self.buyer.token}'
+        # purchases add their transfers to the stats once they commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for player, price in zip(self.team.players.filter(position=PlayerPosition.DEFENDER), (10, 20, 30, 40)):
+                Transfer.objects.create(player=player, price=Money.from_decimal(price * 1000))
+                player_buy(player.id, user=self.buyer)
+            player = self.team.players.filter(position=PlayerPosition.ATTACKER).first()
+            Transfer.objects.create(player=player, price=Money.from_decimal(5000))
+            player_buy(player.id, user=self.buyer)
+
+    def get_stats(self, query: str = '') -> dict:
+        response = self.client.get(f'/api/league/market/stats/?{query}', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def stats_rows(self):
+        return sorted(MarketStats.objects.values_list(
+            'bucket', 'granularity', 'position', 'country', 'price_bin', 'transfers', 'turnover', 'markups',
+            'markup_total'
+        ))
+
+    def test_purchases_update_stats(self) -> None:
+        results = self.get_stats('group_by=position')['results']
+        self.assertEqual([row['position'] for row in results], [PlayerPosition.ATTACKER, PlayerPosition.DEFENDER])
+        defenders = results[1]
+        self.assertNotIn('country', defenders)
+        self.assertEqual(defenders['transfers'], 4)
+        self.assertEqual(defenders['turnover'], '100000.00')
+        self.assertEqual(defenders['average_price'], '25000.00')
+        markups = Transfer.objects.filter(player__position=PlayerPosition.DEFENDER).values_list('markup', flat=True)
+        self.assertEqual(defenders['average_markup'], round(sum(markups) / 4, 1))
+        self.assertLessEqual(10000 / 1.045, float(defenders['price_percentiles']['p10']))
+        self.assertLessEqual(float(defenders['price_percentiles']['p90']), 40000 * 1.045)
+
+        results = self.get_stats(f'group_by=none&position={PlayerPosition.ATTACKER}')['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['transfers'], 1)
+        self.assertEqual(results[0]['average_price'], '5000.00')
+
+    def test_stats_recorded_on_commit(self) -> None:
+        player = self.team.players.filter(position=PlayerPosition.GOALKEEPER).first()
+        Transfer.objects.create(player=player, price=Money.from_decimal(7000))
+        with self.captureOnCommitCallbacks() as callbacks:
+            player_buy(player.id, user=self.buyer)
+        self.assertEqual(self.get_stats(f'position={PlayerPosition.GOALKEEPER}')['results'], [])
+        for callback in callbacks:
+            callback()
+        results = self.get_stats(f'group_by=none&position={PlayerPosition.GOALKEEPER}')['results']
+        self.assertEqual(results[0]['transfers'], 1)
+
+    def test_backfill_matches_incremental_rows(self) -> None:
+        incremental = self.stats_rows()
+        versions = versions_get((TRANSFERS,))
+        MarketStats.objects.all().delete()
+        market_stats_backfill()
+        self.assertEqual(self.stats_rows(), incremental)
+        # cached stats responses are dropped
+        self.assertNotEqual(versions_get((TRANSFERS,)), versions)
+
+    def test_compaction_into_daily_rows(self) -> None:
+        versions = versions_get((TRANSFERS,))
+        market_stats_compact(now=timezone.now() + timedelta(days=30))
+        self.assertNotEqual(versions_get((TRANSFERS,)), versions)
+        self.assertEqual(set(MarketStats.objects.values_list('granularity', flat=True)), {StatsGranularity.DAY})
+        self.assertEqual(MarketStats.objects.filter(position=PlayerPosition.DEFENDER).get(price_bin=price_bin(
+            Money.from_decimal(10000)
+        )).transfers, 1)
+        results = self.get_stats('window=30d&group_by=none')['results']
+        self.assertEqual(results[0]['transfers'], 5)
+        self.assertEqual(results[0]['turnover'], '105000.00')
+
+    def test_invalid_parameters(self) -> None:
+        for query in ('window=2w', 'group_by=team', 'position=striker'):
+            response = self.client.get(f'/api/league/market/stats/?{query}', HTTP_AUTHORIZATION=self.auth_header)
+            self.assertEqual(response.status_code, 400)
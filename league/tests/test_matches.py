@@ -0,0 +1,66 @@
+import numpy as np
+
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+
+from league.matches import POSITIONS, match_goals, round_play, round_play_next, round_schedule, team_strengths
+from league.models import Fixture, MatchResult
+from league.services import SQUAD_POSITIONS, generate_team_with_players
+
+User = get_user_model()
+
+
+class TeamStrengthTestCase(SimpleTestCase):
+    def squad(self, team_id: int, value: int, size: int = len(SQUAD_POSITIONS)) -> list:
+        return [[team_id, POSITIONS.index(position), 26, value] for position in SQUAD_POSITIONS[:size]]
+
+    def test_stronger_squads(self) -> None:
+        players = np.array(self.squad(1, 10 ** 8) + self.squad(2, 10 ** 9) + self.squad(3, 10 ** 8, size=8))
+        attack, defense = team_strengths(np.array([1, 2, 3, 4]), players)
+        self.assertGreater(attack[1], attack[0])
+        self.assertGreater(defense[1], defense[0])
+        # a squad without attackers, and a team without players
+        self.assertLess(attack[2], attack[0])
+        self.assertLess(attack[3], attack[2])
+
+    def test_stronger_side_scores_more(self) -> None:
+        fixtures = 10000
+        strong, weak = np.full(fixtures, 1.0), np.full(fixtures, -1.0)
+        home_goals, away_goals = match_goals(strong, strong, weak, weak, np.random.default_rng(0))
+        self.assertGreater((home_goals > away_goals).mean(), 0.7)
+        even_home, even_away = match_goals(strong, strong, strong, strong, np.random.default_rng(0))
+        self.assertAlmostEqual(even_home.mean() - even_away.mean(), 0.2, delta=0.1)
+
+
+class RoundTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        for number in range(5):
+            generate_team_with_players(User.objects.create_user(email=f'user{number}@onlinesoccermanager.com'))
+        self.pool_team = generate_team_with_players(None)
+
+    def test_schedule_pairs_owned_teams(self) -> None:
+        round_number = round_schedule(seed=1)
+        self.assertEqual(round_number, 1)
+        fixtures = Fixture.objects.filter(round=round_number)
+        self.assertEqual(fixtures.count(), 2)
+        teams = [team for fixture in fixtures for team in (fixture.home_id, fixture.away_id)]
+        self.assertEqual(len(set(teams)), 4)
+        self.assertNotIn(self.pool_team.id, teams)
+        self.assertEqual(round_schedule(seed=1), 2)
+
+    def test_round_is_played_once(self) -> None:
+        result = round_play_next(seed=1)
+        self.assertEqual((result.round, result.fixtures), (1, 2))
+        self.assertEqual(result.home_wins + result.draws + result.away_wins, 2)
+        results = MatchResult.objects.filter(fixture__round=1)
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(sum(match.home_goals + match.away_goals for match in results), result.goals)
+        self.assertEqual(round_play(1).fixtures, 0)
+        self.assertEqual(round_play_next(seed=1).round, 2)
+
+    def test_no_round_without_two_owned_teams(self) -> None:
+        User.objects.exclude(email='user0@onlinesoccermanager.com').delete()
+        self.assertIsNone(round_schedule(seed=1))
+        self.assertEqual(round_play_next(seed=1), (None, 0, 0, 0, 0, 0))
+        self.assertFalse(Fixture.objects.exists())
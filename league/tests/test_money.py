@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from league.models import Team
+from league.services import generate_team_with_players
+from onlinesoccermanager.money import Money, MoneyFormField, MoneySerializerField
+
+User = get_user_model()
+
+
+class MoneyTestCase(SimpleTestCase):
+    def test_decimal_string(self) -> None:
+        self.assertEqual(str(Money(123456)), '1234.56')
+        self.assertEqual(str(Money(5)), '0.05')
+        self.assertEqual(str(Money(-50)), '-0.50')
+        self.assertEqual(str(Money(0)), '0.00')
+        self.assertEqual(repr(Money(100)), "Money('1.00')")
+
+    def test_from_decimal(self) -> None:
+        self.assertEqual(Money.from_decimal('1234.56'), 123456)
+        self.assertEqual(Money.from_decimal(Decimal('0.125')), 12)
+        self.assertEqual(Money.from_decimal(7), 700)
+        self.assertEqual(Money(123456).to_decimal(), Decimal('1234.56'))
+
+    def test_arithmetic_keeps_cents(self) -> None:
+        total = sum([Money(10), Money(20)])
+        self.assertIsInstance(total, Money)
+        self.assertIsInstance(Money(10) - 30, Money)
+        self.assertEqual(str(Money(10) - 30), '-0.20')
+        # half a cent rounds to the even cent
+        self.assertEqual(Money(125).scale(1, 10), 12)
+        self.assertEqual(Money(135).scale(1, 10), 14)
+        self.assertEqual(Money(100000).scale(137, 100), 137000)
+
+    def test_serializer_field(self) -> None:
+        class PriceSerializer(serializers.Serializer):
+            price = MoneySerializerField(min_value=1)
+
+        serializer = PriceSerializer(data={'price': '1250.5'})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['price'], Money(125050))
+        self.assertIsInstance(serializer.validated_data['price'], Money)
+        self.assertFalse(PriceSerializer(data={'price': '0.99'}).is_valid())
+        self.assertFalse(PriceSerializer(data={'price': '1.001'}).is_valid())
+        self.assertEqual(PriceSerializer({'price': Money(125050)}).data['price'], '1250.50')
+
+    def test_form_field(self) -> None:
+        field = MoneyFormField()
+        self.assertEqual(field.clean('99.99'), Money(9999))
+        self.assertEqual(field.prepare_value(Money(9999)), Decimal('99.99'))
+
+
+class MoneyFieldTestCase(TestCase):
+    def test_cents_column(self) -> None:
+        team = generate_team_with_players(User.objects.create_user(email='johndoe@onlinesoccermanager.com'))
+        Team.objects.filter(pk=team.pk).update(budget=Money.from_decimal('10.01'))
+        team.refresh_from_db()
+        self.assertEqual(team.budget, 1001)
+        self.assertIsInstance(team.budget, Money)
+        self.assertTrue(Team.objects.filter(budget__lt=Money.from_decimal(11)).exists())
+        with self.assertRaises(TypeError):
+            Team.objects.filter(budget=Decimal('10.01')).exists()
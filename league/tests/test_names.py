@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from league.names import DEFAULT_LOCALE, country_locale, locale_name_pools, random_player_names
+
+
+class PlayerNamesTestCase(SimpleTestCase):
+
+    def test_country_locale(self) -> None:
+        self.assertEqual(country_locale('IT'), 'it_IT')
+        self.assertEqual(country_locale('gb'), 'en_GB')
+        self.assertEqual(country_locale('KE'), DEFAULT_LOCALE)
+
+    def test_random_player_names_match_country(self) -> None:
+        first_names, last_names = locale_name_pools('it_IT')
+        names = random_player_names('IT', 20)
+        self.assertEqual(len(names), 20)
+        for first_name, last_name in names:
+            self.assertIn(first_name, first_names.names)
+            self.assertIn(last_name, last_names.names)
@@ -0,0 +1,172 @@
+from contextlib import contextmanager
+from random import randint, sample
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+
+from league.models import Player, Transfer
+from league.services import generate_team_with_players
+from onlinesoccermanager.money import Money
+
+User = get_user_model()
+
+NUMBER_OF_TEAMS = 40
+NUMBER_OF_PENDING_TRANSFERS = 150
+PAGE_SIZES = (5, 100)
+
+
+class QueryBudgetTestCase(TestCase):
+    """ Seeds a league with many teams of 20 players and a busy market so that any
+    query which runs per row of a page blows the budget of its endpoint
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        users = User.objects.bulk_create([
+            User(email=f'owner{i}@onlinesoccermanager.com', first_name='Owner', last_name=str(i))
+            for i in range(NUMBER_OF_TEAMS)
+        ])
+        for user in users:
+            generate_team_with_players(user)
+        cls.user = users[0]
+        cls.team = cls.user.team
+        market_players = sample(list(Player.objects.exclude(team=cls.team)), NUMBER_OF_PENDING_TRANSFERS)
+        Transfer.objects.bulk_create([
+            Transfer(player=player, seller_id=player.team_id, price=Money.from_decimal(randint(100000, 2000000)))
+            for player in market_players
+        ])
+        cls.market_player = market_players[0]
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.auth_header = f'Bearer {self.user.token}'
+
+    @contextmanager
+    def assertMaxQueries(self, budget: int):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1))
+            self.fail(f'{executed} queries executed, budget is {budget}\n{queries}')
+
+
+class LeagueQueryBudgetApiTestCase(QueryBudgetTestCase):
+
+    def assertListWithinBudget(self, url: str, budget: int, params: str = '') -> None:
+        for page_size in PAGE_SIZES:
+            with self.subTest(url=url, page_size=page_size, params=params):
+                with self.assertMaxQueries(budget):
+                    response = self.client.get(
+                        f'{url}?page_size={page_size}&{params}',
+                        HTTP_AUTHORIZATION=self.auth_header
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json())
+
+    def test_my_team_retrieve(self) -> None:
+        with self.assertMaxQueries(2):
+            response = self.client.get('/api/league/my_team/', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+
+    def test_my_team_provisioning_status(self) -> None:
+        with self.assertMaxQueries(2):
+            response = self.client.get('/api/league/my_team/status/', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+
+    def test_teams_list(self) -> None:
+        self.assertListWithinBudget('/api/league/teams/', 3)
+        self.assertListWithinBudget('/api/league/teams/', 2, 'cursor=')
+
+    def test_team_retrieve(self) -> None:
+        with self.assertMaxQueries(2):
+            response = self.client.get(f'/api/league/teams/{self.team.id}/', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+
+    def test_team_update(self) -> None:
+        with self.assertMaxQueries(6):
+            response = self.client.patch(
+                f'/api/league/teams/{self.team.id}/',
+                data={'name': 'Budget United', 'country': 'GB'},
+                HTTP_AUTHORIZATION=self.auth_header,
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_team_players_list(self) -> None:
+        url = f'/api/league/teams/{self.team.id}/players/'
+        self.assertListWithinBudget(url, 4)
+        self.assertListWithinBudget(url, 4, 'sort_by=-value&position=defender')
+        self.assertListWithinBudget(url, 3, 'cursor=&sort_by=age')
+
+    def test_players_list(self) -> None:
+        self.assertListWithinBudget('/api/league/players/', 3)
+        self.assertListWithinBudget('/api/league/players/', 3, 'sort_by=-age&country=KE')
+        self.assertListWithinBudget('/api/league/players/', 2, 'cursor=&sort_by=value')
+
+    def test_player_retrieve(self) -> None:
+        player = self.team.players.first()
+        with self.assertMaxQueries(2):
+            response = self.client.get(f'/api/league/players/{player.id}/', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+
+    def test_player_update(self) -> None:
+        player = self.team.players.first()
+        with self.assertMaxQueries(6):
+            response = self.client.patch(
+                f'/api/league/players/{player.id}/',
+                data={'first_name': 'kylian', 'last_name': 'mbappe', 'country': 'FR'},
+                HTTP_AUTHORIZATION=self.auth_header,
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_player_transfer_create(self) -> None:
+        player = self.team.players.first()
+        with self.assertMaxQueries(9):
+            response = self.client.post(
+                f'/api/league/players/{player.id}/transfer/',
+                data={'price': 1500000},
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_player_buy(self) -> None:
+        # includes the upsert of the market stats rollup, run once the purchase commits
+        with self.assertMaxQueries(12), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/league/players/{self.market_player.id}/buy/',
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_pending_transfers_list(self) -> None:
+        self.assertListWithinBudget('/api/league/market/', 3)
+        self.assertListWithinBudget('/api/league/market/', 3, 'sort_by=-price&position=attacker')
+        self.assertListWithinBudget('/api/league/market/', 2, 'cursor=&sort_by=price')
+
+    def test_market_stats(self) -> None:
+        self.assertListWithinBudget('/api/league/market/stats/', 2)
+        self.assertListWithinBudget('/api/league/market/stats/', 2, 'window=365d&group_by=none&position=attacker')
+
+    def test_transfer_retrieve_by_player(self) -> None:
+        with self.assertMaxQueries(2):
+            response = self.client.get(
+                f'/api/league/market/{self.market_player.id}/',
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_exports(self) -> None:
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        # every table of the seeded league fits in one chunk, read after the user is authenticated
+        for name in ('players', 'teams', 'transfers'):
+            with self.subTest(export=name), self.assertMaxQueries(2):
+                response = self.client.get(f'/api/league/export/{name}/', HTTP_AUTHORIZATION=self.auth_header)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(b''.join(response.streaming_content))
@@ -0,0 +1,79 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from league.constants import PlayerPosition
+from league.models import Player, Team, Transfer
+from league.selectors import active_transfers_list, players_list, team_list, team_list_players
+from league.services import generate_team_with_players
+from league.views import PlayerListView, TeamListView, TeamPlayersListView, TransferListView
+from onlinesoccermanager.money import Money
+from onlinesoccermanager.renderers import FastJSONRenderer
+
+User = get_user_model()
+
+
+class FastListRenderingTestCase(TestCase):
+    ''' list responses are built from values() rows, they must match the serializer output byte for byte '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.team = generate_team_with_players(self.user)
+        Team.objects.filter(pk=self.team.pk).update(name='Fútbol Club "Ünïcode" \\')
+        players = list(self.team.players.order_by('id'))
+        Player.objects.filter(pk=players[0].pk).update(first_name='Zoë', last_name='Ødegaard\t ', country='')
+        Player.objects.filter(pk=players[1].pk).update(value=Money.from_decimal('1234567.5'), country='CI')
+        Player.objects.filter(pk=players[2].pk).update(last_name='Line\u2028Separator')
+        for player in players[:3]:
+            Transfer.objects.create(player=player, seller=self.team, price=Money.from_decimal('999999.99'))
+        self.auth_header = f'Bearer {self.user.token}'
+
+    def assertRendersLikeSerializer(self, url: str, view, queryset) -> None:
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        expected = JSONRenderer().render(view.OutputSerializer(queryset, many=True).data)
+        self.assertEqual(response.content, expected)
+
+        stream = b''.join(self.client.get(f'{url}?stream=ndjson', HTTP_AUTHORIZATION=self.auth_header))
+        expected = ''.join(
+            JSONEncoder().encode(view.OutputSerializer(obj).data) + '\n' for obj in queryset
+        ).encode()
+        self.assertEqual(stream, expected)
+
+    def test_team_list(self) -> None:
+        self.assertRendersLikeSerializer('/api/league/teams/', TeamListView, team_list({}))
+
+    def test_team_players_list(self) -> None:
+        self.assertRendersLikeSerializer(
+            f'/api/league/teams/{self.team.id}/players/', TeamPlayersListView, team_list_players(self.team.id, {})
+        )
+
+    def test_players_list(self) -> None:
+        self.assertRendersLikeSerializer('/api/league/players/', PlayerListView, players_list({}))
+
+    def test_transfer_list(self) -> None:
+        self.assertRendersLikeSerializer('/api/league/market/', TransferListView, active_transfers_list({}))
+
+    def test_fast_renderer(self) -> None:
+        data = {
+            'position': PlayerPosition.ATTACKER,
+            'value': Decimal('10.50'),
+            'names': ['Zoë ', None, True, 12],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # pretty printing and integers beyond 64 bits are left to JSONRenderer
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=4'),
+                         JSONRenderer().render(data, 'application/json; indent=4'))
+        self.assertEqual(json.loads(FastJSONRenderer().render([2 ** 70])), [2 ** 70])
@@ -0,0 +1,88 @@
+import io
+
+import numpy as np
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from league.constants import PlayerPosition, TransferStatus
+from league.models import Player, Team, Transfer
+from league.season import POSITIONS, revalue, season_rollover
+from league.services import generate_team_with_players
+from onlinesoccermanager.money import Money
+from oscsettings.models import LeagueSettings
+
+User = get_user_model()
+
+
+class SeasonRolloverTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.team = generate_team_with_players(User.objects.create_user(email='johndoe@onlinesoccermanager.com'))
+        self.other_team = generate_team_with_players(None)
+        self.players = list(Player.objects.order_by('id').values_list('id', 'age', 'value'))
+
+    def tearDown(self) -> None:
+        LeagueSettings.clear_cache()
+        super().tearDown()
+
+    def test_age_curve(self) -> None:
+        positions = np.full(3, POSITIONS.index(PlayerPosition.MIDFIELDER))
+        ages = np.array([19, 27, 38])
+        no_market = np.zeros((len(POSITIONS), 40))
+        young, peak, old = revalue(positions, ages, np.full(3, 100000), no_market, no_market.astype(np.int64))
+        self.assertGreater(young, 100000)
+        self.assertEqual(peak, 100000)
+        self.assertLess(old, 100000)
+
+    def test_rollover_ages_and_revalues(self) -> None:
+        team_updated_at = self.team.updated_at
+        rollover = season_rollover(chunk_size=7)
+        self.assertEqual(rollover.players, len(self.players))
+        players = Player.objects.order_by('id').values_list('id', 'age', 'value')
+        self.assertEqual([age for _, age, _ in players], [age + 1 for _, age, _ in self.players])
+        self.assertNotEqual([value for _, _, value in players], [value for _, _, value in self.players])
+        self.assertEqual(rollover.value_after, sum(value for _, _, value in players))
+        for team in Team.objects.all():
+            self.assertEqual(team.value, team.compute_value())
+        self.team.refresh_from_db()
+        self.assertGreater(self.team.updated_at, team_updated_at)
+
+    def test_recent_transfers_set_market_price(self) -> None:
+        attackers = self.other_team.players.filter(position=PlayerPosition.ATTACKER)
+        sold = attackers[0]
+        Player.objects.filter(pk=sold.pk).update(age=30)
+        transfer = Transfer.objects.create(player=sold, price=Money.from_decimal(9000000))
+        Transfer.objects.filter(pk=transfer.pk).update(status=TransferStatus.COMPLETE)
+        player = attackers[1]
+        Player.objects.filter(pk=player.pk).update(age=29, value=Money.from_decimal(1000000))
+        season_rollover()
+        player.refresh_from_db()
+        self.assertEqual(player.age, 30)
+        # 0.88 of its value at 30, moved a fortieth of the way to the price by one of 20 full weight transfers
+        self.assertEqual(player.value, Money.from_decimal(880000 * 0.975 + 9000000 * 0.025))
+
+    def test_dry_run(self) -> None:
+        rollover = season_rollover(dry_run=True)
+        self.assertEqual(rollover.teams, 0)
+        self.assertEqual(list(Player.objects.order_by('id').values_list('id', 'age', 'value')), self.players)
+        self.assertIsNone(LeagueSettings.objects.get(pk=1).season_started_at)
+
+    def test_rollover_once_per_season(self) -> None:
+        season_rollover()
+        self.assertEqual(LeagueSettings.objects.get(pk=1).season, 2)
+        players = list(Player.objects.order_by('id').values_list('id', 'age', 'value'))
+        self.assertIsNone(season_rollover())
+        with self.assertRaises(CommandError):
+            call_command('season_rollover', stdout=io.StringIO())
+        self.assertEqual(list(Player.objects.order_by('id').values_list('id', 'age', 'value')), players)
+        self.assertEqual(LeagueSettings.objects.get(pk=1).season, 2)
+
+        self.assertEqual(season_rollover(force=True).players, len(players))
+        self.assertEqual(LeagueSettings.objects.get(pk=1).season, 3)
+        self.assertEqual(
+            [age for _, age, _ in Player.objects.order_by('id').values_list('id', 'age', 'value')],
+            [age + 2 for _, age, _ in self.players]
+        )
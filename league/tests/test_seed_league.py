@@ -0,0 +1,41 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from league.constants import TransferStatus
+from league.models import Team, Player, Transfer
+from league.services import SQUAD_POSITIONS
+
+User = get_user_model()
+
+
+class SeedLeagueTestCase(TestCase):
+    def seed(self, **options) -> None:
+        call_command('seed_league', stdout=io.StringIO(), **options)
+
+    def test_seed_league(self) -> None:
+        # a batch smaller than the league, so rows are copied in several batches
+        self.seed(teams=5, transfers=7, seed=3, batch_size=2, password='barbarfoo')
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Team.objects.filter(owner__isnull=False).count(), 5)
+        self.assertEqual(Player.objects.count(), 5 * len(SQUAD_POSITIONS))
+        self.assertEqual(Transfer.objects.filter(status=TransferStatus.PENDING).count(), 7)
+        team = Team.objects.first()
+        self.assertEqual(team.value, team.compute_value())
+
+        response = self.client.post(
+            '/api/auth/login/', data={'email': 'seed3.0@onlinesoccermanager.com', 'password': 'barbarfoo'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        token = response.json()['token']
+        response = self.client.get('/api/league/my_team/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_seed_is_used_once(self) -> None:
+        self.seed(teams=1, seed=4)
+        with self.assertRaises(CommandError):
+            self.seed(teams=1, seed=4)
@@ -0,0 +1,191 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from league.constants import TransferStatus
+from league.models import Team, Player, Transfer
+from league.services import TEAM_POOL_LOCK_KEY, generate_team_with_players, player_buy, \
+    team_create_with_unique_name, team_pool_claim, team_pool_replenish
+from onlinesoccermanager.money import Money
+from oscsettings.models import LeagueSettings
+
+User = get_user_model()
+
+
+class TeamValueTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.team = generate_team_with_players(self.user)
+
+    def test_generated_team_value(self) -> None:
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.value, self.team.compute_value())
+        self.assertGreater(self.team.value, 0)
+
+    def test_team_value_after_player_buy(self) -> None:
+        other_user = User.objects.create_user(
+            email='notme@onlinesoccermanager.com',
+            first_name='Not',
+            last_name='Me',
+            password='barbarfoo'
+        )
+        buyer = generate_team_with_players(other_user)
+        player = self.team.players.first()
+        Transfer.objects.create(player=player, price=Money.from_decimal(100000))
+        player_buy(player.id, user=other_user)
+        self.team.refresh_from_db()
+        buyer.refresh_from_db()
+        self.assertEqual(self.team.value, self.team.compute_value())
+        self.assertEqual(buyer.value, buyer.compute_value())
+
+    def test_team_value_after_player_delete(self) -> None:
+        self.team.players.first().delete()
+        self.team.players.filter(position='attacker').delete()
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.value, self.team.compute_value())
+
+    def test_rebuild_team_values_command(self) -> None:
+        Team.objects.filter(pk=self.team.pk).update(value=Money.from_decimal(1))
+        Player.objects.bulk_create([Player(team=self.team, first_name='first', last_name='last', age=22)])
+
+        out = StringIO()
+        call_command('rebuild_team_values', '--dry-run', stdout=out)
+        self.assertIn('found 1', out.getvalue())
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.value, Money.from_decimal(1))
+
+        out = StringIO()
+        call_command('rebuild_team_values', '--chunk-size', '1', stdout=out)
+        self.assertIn('fixed 1', out.getvalue())
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.value, self.team.compute_value())
+
+
+class TeamCreateWithUniqueNameTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.other_user = User.objects.create_user(
+            email='notme@onlinesoccermanager.com',
+            first_name='Not',
+            last_name='Me',
+            password='barbarfoo'
+        )
+        Team.objects.create(owner=self.other_user, name='Nairobi ABCDEFGHIJ')
+
+    @patch('league.services.choices')
+    def test_team_name_clash_is_retried(self, choices_mock) -> None:
+        choices_mock.side_effect = [list('ABCDEFGHIJ'), list('KLMNOPQRSTU')]
+        fake = type('Fake', (), {'city': lambda self: 'Nairobi'})()
+        team = team_create_with_unique_name(self.user, fake)
+        self.assertEqual(team.name, 'Nairobi KLMNOPQRSTU')
+        self.assertEqual(Team.objects.count(), 2)
+
+    def test_owner_clash_is_not_retried(self) -> None:
+        generate_team_with_players(self.user)
+        with self.assertRaises(IntegrityError):
+            generate_team_with_players(self.user)
+
+
+class TeamPoolTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        cache.clear()
+        self.league_settings = LeagueSettings.load()
+        self.league_settings.team_pool_size = 3
+        self.league_settings.team_pool_low_water_mark = 2
+        self.league_settings.save()
+
+    def tearDown(self) -> None:
+        LeagueSettings.clear_cache()
+        super().tearDown()
+
+    def test_team_pool_replenish(self) -> None:
+        self.assertEqual(team_pool_replenish(), 3)
+        self.assertEqual(Team.objects.filter(owner__isnull=True).count(), 3)
+        self.assertEqual(Player.objects.filter(team__owner__isnull=True).count(), 60)
+        self.assertEqual(team_pool_replenish(), 0)
+
+    def test_team_pool_replenish_runs_once(self) -> None:
+        # another worker refilling the pool holds the lock
+        other_connection = connection.copy()
+        try:
+            with other_connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_lock(%s)', [TEAM_POOL_LOCK_KEY])
+            self.assertEqual(team_pool_replenish(), 0)
+            self.assertFalse(Team.objects.filter(owner__isnull=True).exists())
+            with other_connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [TEAM_POOL_LOCK_KEY])
+        finally:
+            other_connection.close()
+        self.assertEqual(team_pool_replenish(), 3)
+
+    def test_team_pool_claim(self) -> None:
+        self.assertIsNone(team_pool_claim(self.user))
+        team_pool_replenish()
+        team = team_pool_claim(self.user)
+        self.assertEqual(team.owner, self.user)
+        self.assertEqual(team.players.count(), 20)
+        self.assertEqual(Team.objects.filter(owner__isnull=True).count(), 2)
+
+    def test_pool_teams_are_not_listed(self) -> None:
+        team_pool_replenish()
+        auth_header = f'Bearer {self.user.token}'
+        self.assertEqual(self.client.get('/api/league/teams/', HTTP_AUTHORIZATION=auth_header).json(), [])
+        self.assertEqual(self.client.get('/api/league/players/', HTTP_AUTHORIZATION=auth_header).json(), [])
+        team = Team.objects.filter(owner__isnull=True).first()
+        player = team.players.first()
+        for url in (f'/api/league/teams/{team.id}/', f'/api/league/teams/{team.id}/players/',
+                    f'/api/league/players/{player.id}/'):
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=auth_header).status_code, 404)
+
+        self.assertEqual(team_pool_claim(self.user), team)
+        self.assertFalse(team.players.filter(pooled=True).exists())
+        self.assertEqual(self.client.get(f'/api/league/players/{player.id}/', HTTP_AUTHORIZATION=auth_header).status_code, 200)
+        self.assertEqual(len(self.client.get('/api/league/players/', HTTP_AUTHORIZATION=auth_header).json()), 20)
+
+
+class TransferConstraintTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        self.team = generate_team_with_players(self.user)
+        self.player = self.team.players.first()
+
+    def test_one_pending_transfer_per_player(self) -> None:
+        Transfer.objects.create(player=self.player, price=Money.from_decimal(100000))
+        with self.assertRaises(IntegrityError):
+            Transfer.objects.create(player=self.player, price=Money.from_decimal(200000))
+
+    def test_completed_transfers_do_not_count(self) -> None:
+        transfer = Transfer.objects.create(player=self.player, price=Money.from_decimal(100000))
+        Transfer.objects.filter(pk=transfer.pk).update(status=TransferStatus.COMPLETE)
+        Transfer.objects.create(player=self.player, price=Money.from_decimal(200000))
+        self.assertEqual(self.player.transfers.count(), 2)
@@ -1,10 +1,12 @@
 from django.urls import path
 from league.views import TeamUpdateRetrieveView, TeamPlayersListView, PlayerUpdateRetrieveView, \
     PlayerTransferPostView, TransferListView, MyTeamRetrieveView, TeamListView, PlayerListView, \
-        PlayerBuyView, TransferPlayerRetrieveView
+        PlayerBuyView, TransferPlayerRetrieveView, MyTeamProvisioningStatusView, ExportView, \
+        MarketStatsView
 
 urlpatterns = [
     path('my_team/', MyTeamRetrieveView.as_view(), name='my_team_retrieve'),
+    path('my_team/status/', MyTeamProvisioningStatusView.as_view(), name='my_team_provisioning_status'),
     path('teams/', TeamListView.as_view(), name='teams_list'),
     path('teams/<int:team_id>/', TeamUpdateRetrieveView.as_view(), name='team_update_retrieve'),
     path('teams/<int:team_id>/players/', TeamPlayersListView.as_view(), name='team_list_players'),
@@ -13,6 +15,10 @@ urlpatterns = [
     path('players/<int:player_id>/transfer/', PlayerTransferPostView.as_view(), name='player_transfer_create'),
     path('players/<int:player_id>/buy/', PlayerBuyView.as_view(), name='player_buy'),
     path('market/', TransferListView.as_view(), name='pending_transfers_list'),
+    path('market/stats/', MarketStatsView.as_view(), name='market_stats'),
     path('market/<int:player_id>/', TransferPlayerRetrieveView.as_view(), name='player_id_retrieve_transfer'),
+    path('export/players/', ExportView.as_view(export_name='players'), name='players_export'),
+    path('export/teams/', ExportView.as_view(export_name='teams'), name='teams_export'),
+    path('export/transfers/', ExportView.as_view(export_name='transfers'), name='transfers_export'),
     # path('market/<int:transfer_id>/buy/', TransferBuyPostView.as_view(), name='complete_player_transfer'),
 ]
@@ -1,54 +1,89 @@
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import status, serializers
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_countries.serializer_fields import CountryField
+from league.cache import PLAYERS, TEAMS, TRANSFERS, VersionedResponseCacheMixin
 from league.constants import PlayerPosition
+from league.exports import CONTENT_TYPES, CSV, FORMATS, export_queryset, export_stream
+from league.market_stats import GROUPINGS, WINDOWS, market_stats_list, window_start
 
 from league.selectors import team_retrieve, team_list_players, player_retrieve, \
-    active_transfers_list, user_team_retrieve, team_list, players_list, transfer_retrieve_by_player_id
+    active_transfers_list, user_team_retrieve, team_list, players_list, transfer_retrieve_by_player_id, \
+    user_team_provisioning_status, user_team_stamps, team_stamps, player_stamps, transfer_stamps_by_player_id
 from league.services import team_update, player_update, player_transfer_create, \
     player_buy
+from onlinesoccermanager.etags import ConditionalGetMixin, make_etag
+from onlinesoccermanager.money import MoneySerializerField
 from onlinesoccermanager.pagination import LinkHeaderPagination
+from onlinesoccermanager.projections import ValuesProjection
+from onlinesoccermanager.renderers import FastJSONRenderer
 
 
-class MyTeamRetrieveView(APIView):
+class MyTeamRetrieveView(ConditionalGetMixin, APIView):
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         name = serializers.CharField()
         country = CountryField(name_only=True)
-        budget = serializers.DecimalField(max_digits=65, decimal_places=2)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
+        budget = MoneySerializerField()
+        value = MoneySerializerField()
+
+    def get_etag_stamps(self, request):
+        return user_team_stamps(request.user)
 
     def get(self, request):
+        not_modified = self.get_not_modified_response(request)
+        if not_modified is not None:
+            return not_modified
         team = user_team_retrieve(request.user)
         response_data = self.OutputSerializer(team).data
+        return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': make_etag(team.updated_at)})
+
+
+class MyTeamProvisioningStatusView(APIView):
+    class OutputSerializer(serializers.Serializer):
+        status = serializers.CharField()
+        team = serializers.IntegerField(allow_null=True)
+
+    def get(self, request):
+        provisioning_status = user_team_provisioning_status(request.user)
+        response_data = self.OutputSerializer(provisioning_status).data
         return Response(response_data, status=status.HTTP_200_OK)
 
 
-class TeamListView(APIView, LinkHeaderPagination):
+class TeamListView(VersionedResponseCacheMixin, APIView, LinkHeaderPagination):
+    cache_entities = (TEAMS,)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
     class FilterSerializer(serializers.Serializer):
         country = CountryField(required=False)
+        search = serializers.CharField(max_length=100, required=False)
 
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         name = serializers.CharField()
         country = CountryField(name_only=True)
         # budget = serializers.DecimalField(max_digits=65, decimal_places=2)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
+        value = MoneySerializerField()
+
+    output_projection = ValuesProjection(OutputSerializer)
 
     def get(self, request):
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
         teams = team_list(filters=filter_serializer.validated_data)
-        page = self.paginate_queryset(teams, request, view=self)
-        if page is not None:
-            response_data = self.OutputSerializer(page, many=True).data
-            return self.get_paginated_response(response_data)
-        response_data = self.OutputSerializer(teams, many=True).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        if self.stream_requested(request):
+            return self.get_streaming_response(teams, self.output_projection)
+        return self.get_list_response(request, teams, self.output_projection)
 
 
-class TeamUpdateRetrieveView(APIView):
+class TeamUpdateRetrieveView(ConditionalGetMixin, APIView):
 
     class InputSerializer(serializers.Serializer):
         name = serializers.CharField(required=False, allow_null=False)
@@ -64,14 +99,20 @@ class TeamUpdateRetrieveView(APIView):
         id = serializers.IntegerField()
         name = serializers.CharField()
         country = CountryField(name_only=True)
-        budget = serializers.DecimalField(max_digits=65, decimal_places=2)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
+        budget = MoneySerializerField()
+        value = MoneySerializerField()
         owner = OwnerSerializer()
 
+    def get_etag_stamps(self, request, team_id):
+        return team_stamps(team_id)
+
     def get(self, request, team_id):
+        not_modified = self.get_not_modified_response(request, team_id=team_id)
+        if not_modified is not None:
+            return not_modified
         team = team_retrieve(team_id)
         response_data = self.OutputSerializer(team).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': make_etag(team.updated_at)})
 
     def patch(self, request, team_id):
         team = team_retrieve(team_id)
@@ -79,14 +120,20 @@ class TeamUpdateRetrieveView(APIView):
         team_update_serializer.is_valid(raise_exception=True)
         team = team_update(**team_update_serializer.validated_data, team=team, user=request.user)
         response_data = self.OutputSerializer(team).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': make_etag(team.updated_at)})
 
 
-class TeamPlayersListView(APIView, LinkHeaderPagination):
+class TeamPlayersListView(VersionedResponseCacheMixin, APIView, LinkHeaderPagination):
+    cache_entities = (PLAYERS,)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
 
     class FilterSerializer(serializers.Serializer):
         position = serializers.ChoiceField(choices=PlayerPosition.choices, required=False)
         country = CountryField(required=False)
+        min_age = serializers.IntegerField(min_value=0, required=False)
+        max_age = serializers.IntegerField(min_value=0, required=False)
+        min_value = MoneySerializerField(required=False)
+        max_value = MoneySerializerField(required=False)
         sort_by = serializers.ChoiceField(choices=('age', '-age', 'value', '-value'), required=False)
 
     class OutputSerializer(serializers.Serializer):
@@ -96,26 +143,32 @@ class TeamPlayersListView(APIView, LinkHeaderPagination):
         age = serializers.IntegerField()
         position = serializers.CharField()
         country = CountryField(name_only=True)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
+        value = MoneySerializerField()
         # team = serializers.IntegerField(source='team.id')
 
+    output_projection = ValuesProjection(OutputSerializer)
 
     def get(self, request, team_id):
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
         players = team_list_players(team_id, filters=filter_serializer.validated_data)
-        page = self.paginate_queryset(players, request, view=self)
-        if page is not None:
-            response_data = self.OutputSerializer(page, many=True).data
-            return self.get_paginated_response(response_data)
-        response_data = self.OutputSerializer(players, many=True).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        if self.stream_requested(request):
+            return self.get_streaming_response(players, self.output_projection)
+        return self.get_list_response(request, players, self.output_projection)
+
 
+class PlayerListView(VersionedResponseCacheMixin, APIView, LinkHeaderPagination):
+    cache_entities = (PLAYERS, TEAMS)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
 
-class PlayerListView(APIView, LinkHeaderPagination):
     class FilterSerializer(serializers.Serializer):
         team = serializers.IntegerField(required=False)
         country = CountryField(required=False)
+        search = serializers.CharField(max_length=100, required=False)
+        min_age = serializers.IntegerField(min_value=0, required=False)
+        max_age = serializers.IntegerField(min_value=0, required=False)
+        min_value = MoneySerializerField(required=False)
+        max_value = MoneySerializerField(required=False)
         sort_by = serializers.ChoiceField(choices=('age', '-age', 'value', '-value'), required=False)
 
     class OutputSerializer(serializers.Serializer):
@@ -125,22 +178,21 @@ class PlayerListView(APIView, LinkHeaderPagination):
         age = serializers.IntegerField()
         position = serializers.CharField()
         country = CountryField(name_only=True)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
-        team = serializers.IntegerField(source='team.id')
+        value = MoneySerializerField()
+        team = serializers.IntegerField(source='team_id')
+
+    output_projection = ValuesProjection(OutputSerializer)
 
     def get(self, request):
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
         players = players_list(filters=filter_serializer.validated_data)
-        page = self.paginate_queryset(players, request, view=self)
-        if page is not None:
-            response_data = self.OutputSerializer(page, many=True).data
-            return self.get_paginated_response(response_data)
-        response_data = self.OutputSerializer(players, many=True).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        if self.stream_requested(request):
+            return self.get_streaming_response(players, self.output_projection)
+        return self.get_list_response(request, players, self.output_projection)
 
 
-class PlayerUpdateRetrieveView(APIView):
+class PlayerUpdateRetrieveView(ConditionalGetMixin, APIView):
 
     class InputSerializer(serializers.Serializer):
         first_name = serializers.CharField(required=False, allow_null=False)
@@ -154,14 +206,21 @@ class PlayerUpdateRetrieveView(APIView):
         age = serializers.IntegerField()
         position = serializers.CharField()
         country = CountryField(name_only=True)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
+        value = MoneySerializerField()
         team = serializers.IntegerField(source='team.id')
         team_name = serializers.CharField(source='team.name')
 
+    def get_etag_stamps(self, request, player_id):
+        return player_stamps(player_id)
+
     def get(self, request, player_id):
+        not_modified = self.get_not_modified_response(request, player_id=player_id)
+        if not_modified is not None:
+            return not_modified
         player = player_retrieve(player_id)
         response_data = self.OutputSerializer(player).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        etag = make_etag(player.updated_at, player.team.updated_at)
+        return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
     def patch(self, request, player_id):
         player = player_retrieve(player_id)
@@ -169,15 +228,19 @@ class PlayerUpdateRetrieveView(APIView):
         player_update_serializer.is_valid(raise_exception=True)
         player = player_update(**player_update_serializer.validated_data, player=player, user=request.user)
         response_data = self.OutputSerializer(player).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        etag = make_etag(player.updated_at, player.team.updated_at)
+        return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
 
-class TransferListView(APIView, LinkHeaderPagination):
+class TransferListView(VersionedResponseCacheMixin, APIView, LinkHeaderPagination):
+    cache_entities = (TRANSFERS, PLAYERS, TEAMS)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
 
     class FilterSerializer(serializers.Serializer):
         position = serializers.ChoiceField(choices=PlayerPosition.choices, required=False)
         player = serializers.IntegerField(required=False)
         seller = serializers.IntegerField(required=False)
+        search = serializers.CharField(max_length=100, required=False)
         sort_by = serializers.ChoiceField(choices=('price', '-price'), required=False)
 
     class OutputSerializer(serializers.Serializer):
@@ -188,22 +251,21 @@ class TransferListView(APIView, LinkHeaderPagination):
         position = serializers.CharField(source='player.position')
         seller = serializers.IntegerField(source='seller.id')
         seller_name = serializers.CharField(source='seller.name')
-        price = serializers.DecimalField(max_digits=65, decimal_places=2)
+        price = MoneySerializerField()
         status = serializers.CharField()
 
+    output_projection = ValuesProjection(OutputSerializer)
+
     def get(self, request):
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
         transfers = active_transfers_list(filters=filter_serializer.validated_data)
-        page = self.paginate_queryset(transfers, request, view=self)
-        if page is not None:
-            response_data = self.OutputSerializer(page, many=True).data
-            return self.get_paginated_response(response_data)
-        response_data = self.OutputSerializer(transfers, many=True).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        if self.stream_requested(request):
+            return self.get_streaming_response(transfers, self.output_projection)
+        return self.get_list_response(request, transfers, self.output_projection)
 
 
-class TransferPlayerRetrieveView(APIView):
+class TransferPlayerRetrieveView(ConditionalGetMixin, APIView):
 
     class OutputSerializer(serializers.Serializer):
         player = serializers.IntegerField(source='player.id')
@@ -214,20 +276,64 @@ class TransferPlayerRetrieveView(APIView):
         age = serializers.IntegerField(source='player.age')
         team = serializers.IntegerField(source='seller.id')
         team_name = serializers.CharField(source='seller.name')
-        current_value = serializers.DecimalField(source='player.value', max_digits=65, decimal_places=2)
-        price = serializers.DecimalField(max_digits=65, decimal_places=2)
+        current_value = MoneySerializerField(source='player.value')
+        price = MoneySerializerField()
         status = serializers.CharField()
 
+    def get_etag_stamps(self, request, player_id):
+        return transfer_stamps_by_player_id(player_id)
+
     def get(self, request, player_id):
+        not_modified = self.get_not_modified_response(request, player_id=player_id)
+        if not_modified is not None:
+            return not_modified
         transfer = transfer_retrieve_by_player_id(player_id)
         response_data = self.OutputSerializer(transfer).data
-        return Response(response_data, status=status.HTTP_200_OK)
+        etag = make_etag(transfer.updated_at, transfer.player.updated_at, transfer.seller.updated_at)
+        return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+
+class MarketStatsView(VersionedResponseCacheMixin, APIView):
+    cache_entities = (TRANSFERS,)
+
+    class FilterSerializer(serializers.Serializer):
+        window = serializers.ChoiceField(choices=tuple(WINDOWS), default='7d')
+        group_by = serializers.ChoiceField(choices=tuple(GROUPINGS), default='position,country')
+        position = serializers.ChoiceField(choices=PlayerPosition.choices, required=False)
+        country = CountryField(required=False)
+
+    class OutputSerializer(serializers.Serializer):
+        position = serializers.CharField(required=False)
+        country = CountryField(name_only=True, required=False)
+        transfers = serializers.IntegerField()
+        turnover = MoneySerializerField()
+        average_price = MoneySerializerField()
+        average_markup = serializers.FloatField(allow_null=True)
+        price_percentiles = serializers.DictField(child=MoneySerializerField())
+
+    def get(self, request):
+        filter_serializer = self.FilterSerializer(data=request.query_params)
+        filter_serializer.is_valid(raise_exception=True)
+        filters = filter_serializer.validated_data
+
+        def build_response():
+            since = window_start(filters['window'])
+            stats = market_stats_list(
+                since, GROUPINGS[filters['group_by']], filters.get('position'), filters.get('country')
+            )
+            response_data = {
+                'window': filters['window'],
+                'since': since,
+                'results': self.OutputSerializer(stats, many=True).data,
+            }
+            return Response(response_data, status=status.HTTP_200_OK)
+        return self.get_cached_response(request, build_response)
 
 
 class PlayerTransferPostView(APIView):
 
     class InputSerializer(serializers.Serializer):
-        price = serializers.DecimalField(max_digits=65, decimal_places=2, min_value=1)
+        price = MoneySerializerField(min_value=1)
 
     class OutputSerializer(serializers.Serializer):
         # id = serializers.IntegerField()
@@ -237,7 +343,7 @@ class PlayerTransferPostView(APIView):
         position = serializers.CharField(source='player.position')
         seller = serializers.IntegerField(source='seller.id')
         seller_name = serializers.CharField(source='seller.name')
-        price = serializers.DecimalField(max_digits=65, decimal_places=2)
+        price = MoneySerializerField()
         status = serializers.CharField()
 
     def post(self, request, player_id):
@@ -261,7 +367,7 @@ class PlayerBuyView(APIView):
         age = serializers.IntegerField()
         position = serializers.CharField()
         country = CountryField(name_only=True)
-        value = serializers.DecimalField(max_digits=65, decimal_places=2)
+        value = MoneySerializerField()
         team = serializers.IntegerField(source='team.id')
         team_name = serializers.CharField(source='team.name')
 
@@ -271,6 +377,42 @@ class PlayerBuyView(APIView):
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
+class ExportContentNegotiation(BaseContentNegotiation):
+    ''' ?format= picks the file of an export rather than a renderer, errors are always JSON '''
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ExportView(APIView):
+    ''' streams a whole table as CSV or NDJSON, gzipped on the fly when the client accepts it. staff only '''
+    export_name = None
+    permission_classes = (IsAdminUser,)
+    content_negotiation_class = ExportContentNegotiation
+
+    class FilterSerializer(serializers.Serializer):
+        format = serializers.ChoiceField(choices=FORMATS, default=CSV)
+
+    def get(self, request):
+        filter_serializer = self.FilterSerializer(data=request.query_params)
+        filter_serializer.is_valid(raise_exception=True)
+        file_format = filter_serializer.validated_data['format']
+        rows = export_queryset(self.export_name, request.query_params)
+
+        content = export_stream(self.export_name, rows, file_format)
+        response = StreamingHttpResponse(content_type=CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{file_format}"'
+        if re_accepts_gzip.search(request.headers.get('Accept-Encoding', '')):
+            content = compress_sequence(content)
+            response['Content-Encoding'] = 'gzip'
+        response.streaming_content = content
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
 # class TransferBuyPostView(APIView):
 
 #     class OutputSerializer(serializers.Serializer):
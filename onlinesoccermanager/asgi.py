@@ -2,6 +2,8 @@
 ASGI config for onlinesoccermanager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django through onlinesoccermanager.handlers.StreamingASGIHandler,
+websockets to the consumers routed in league.routing.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +11,17 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from onlinesoccermanager.handlers import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'onlinesoccermanager.settings')
 
-application = get_asgi_application()
+# set up Django before importing consumers, they import models
+django_asgi_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from league.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_application,
+    'websocket': URLRouter(websocket_urlpatterns),
+})
@@ -0,0 +1,46 @@
+import hashlib
+from typing import Any, Optional
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """ A strong ETag over the version stamps or content a response is built from """
+    return '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def etag_matches(request, etag: str) -> bool:
+    """ Weak comparison as If-None-Match asks for, so ETags weakened by compression still match """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in etags)
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+class ConditionalGetMixin:
+    """ Answers a GET whose If-None-Match still matches with 304 before the object is loaded.
+
+    Views implement ``get_etag_stamps``, reading only the version stamps of the rows behind
+    the response, and tag full responses with ``make_etag`` over the same stamps taken
+    from the loaded objects.
+    """
+
+    def get_etag_stamps(self, request, **kwargs) -> Optional[tuple]:
+        raise NotImplementedError(f'{type(self).__name__} must implement get_etag_stamps() to use ConditionalGetMixin')
+
+    def get_not_modified_response(self, request, **kwargs) -> Optional[Response]:
+        if 'If-None-Match' not in request.headers:
+            return None
+        stamps = self.get_etag_stamps(request, **kwargs)
+        if stamps is None:
+            return None
+        etag = make_etag(*stamps)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+        return None
@@ -0,0 +1,53 @@
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ Pulls each part of a streaming response on the thread sync views run on.
+
+    Django 4.0 iterates streaming responses on the event loop, so iterators that
+    query the database as they go, like the NDJSON streams and the exports, raise
+    ``SynchronousOnlyOperation`` there. Parts are still sent as soon as they are built.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.get_response_headers(response),
+        })
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        end = object()
+        while True:
+            part = await next_part(parts, end)
+            if part is end:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    def get_response_headers(self, response):
+        """ headers and cookies as ASGI wants them, the same way ``ASGIHandler.send_response`` encodes them """
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+        return headers
+
+
+def get_asgi_application():
+    """ ``django.core.asgi.get_asgi_application`` returning a StreamingASGIHandler """
+    django.setup(set_prefix=False)
+    return StreamingASGIHandler()
@@ -0,0 +1,117 @@
+from decimal import ROUND_HALF_EVEN, Decimal
+from django import forms
+from django.db import models
+from rest_framework import serializers
+
+# money is stored and computed in cents, whole integers, and shown with two decimal places
+CENTS = 100
+DECIMAL_PLACES = 2
+# the largest amount a bigint of cents holds has 19 digits, keep a margin for sums
+MAX_DIGITS = 18
+
+
+class Money(int):
+    """ An amount of money counted in cents.
+
+    Adding and subtracting amounts is exact integer arithmetic and keeps the type.
+    ``str()`` gives the decimal string the API shows, ``repr()`` the amount with its type.
+    """
+
+    @classmethod
+    def from_decimal(cls, value) -> 'Money':
+        """ value in currency units, rounded half to even to whole cents """
+        return cls(Decimal(value).scaleb(DECIMAL_PLACES).to_integral_value(ROUND_HALF_EVEN))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(int(self)).scaleb(-DECIMAL_PLACES)
+
+    def scale(self, numerator: int, denominator: int) -> 'Money':
+        """ the amount times numerator / denominator, rounded half to even to whole cents """
+        quotient, remainder = divmod(int(self) * numerator, denominator)
+        if 2 * remainder > denominator or (2 * remainder == denominator and quotient % 2):
+            quotient += 1
+        return Money(quotient)
+
+    def __str__(self) -> str:
+        units, cents = divmod(abs(int(self)), CENTS)
+        return f'{"-" if self < 0 else ""}{units}.{cents:02d}'
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    def __add__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(int(self) + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(int(self) - other)
+
+    def __rsub__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(other - int(self))
+
+    def __neg__(self):
+        return Money(-int(self))
+
+
+class MoneyFormField(forms.DecimalField):
+    ''' edits an amount in currency units, as the admin shows it '''
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', MAX_DIGITS)
+        super().__init__(decimal_places=DECIMAL_PLACES, **kwargs)
+
+    def prepare_value(self, value):
+        return value.to_decimal() if isinstance(value, Money) else value
+
+    def clean(self, value):
+        value = super().clean(value)
+        return None if value is None else Money.from_decimal(value)
+
+
+class MoneyField(models.BigIntegerField):
+    """ An amount stored as a bigint of cents and read back as ``Money``.
+
+    Plain integers are taken as cents. Decimals and floats are refused rather than
+    guessed at, convert them with ``Money.from_decimal``.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else Money(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        return Money(super().to_python(value))
+
+    def get_prep_value(self, value):
+        if isinstance(value, (Decimal, float)):
+            raise TypeError(f'{self.name} is counted in cents, convert {value!r} with Money.from_decimal')
+        return super().get_prep_value(value)
+
+    def formfield(self, **kwargs):
+        # the bounds IntegerField adds are in cents, the form is in currency units
+        return models.Field.formfield(self, **{'form_class': MoneyFormField, **kwargs})
+
+
+class MoneySerializerField(serializers.DecimalField):
+    """ Reads and writes the decimal strings of the API, ``'1250.50'``, for an amount in cents.
+    ``min_value`` and ``max_value`` are in currency units like the input they validate.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', MAX_DIGITS)
+        super().__init__(decimal_places=DECIMAL_PLACES, **kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        value = super().run_validation(data)
+        return None if value is None else Money.from_decimal(value)
+
+    def to_representation(self, value):
+        return str(value if isinstance(value, Money) else Money(value))
@@ -1,5 +1,16 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
@@ -7,12 +18,35 @@ class LinkHeaderPagination(PageNumberPagination):
     """ Inform the user of pagination links via response headers, similar to
     what's described in
     https://developer.github.com/guides/traversing-with-pagination/.
+
+    Sending the ``cursor`` query param (empty for the first page) switches to
+    keyset pagination on ``(sort key, id)``: no COUNT query is run and deep
+    pages cost the same as the first one. ``next``/``prev`` links then carry
+    opaque cursors instead of page numbers.
+
+    Clients that really need every row send ``?stream=ndjson`` and get one JSON
+    object per line, read a chunk at a time by keyset queries instead of being built in memory.
     """
 
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    stream_query_param = 'stream'
+    stream_content_type = 'application/x-ndjson'
+
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view=view)
+        return self.paginate_queryset_by_cursor(queryset, request)
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return self.get_cursor_paginated_response(data)
+
         next_url = self.get_next_link()
         previous_url = self.get_previous_link()
         first_url = self.get_first_link()
@@ -49,3 +83,152 @@ class LinkHeaderPagination(PageNumberPagination):
                 self.page_query_param,
                 self.page.paginator.num_pages,
             )
+
+    def stream_requested(self, request):
+        return request.query_params.get(self.stream_query_param) == 'ndjson'
+
+    def get_streaming_response(self, queryset, projection):
+        chunk_size = getattr(settings, 'STREAM_CHUNK_SIZE', 2000)
+        encoder = JSONEncoder()
+        rows = projection.values(self.order_by_cursor(queryset))
+
+        def stream_rows():
+            for chunk in self.iterate_chunks(rows, chunk_size):
+                yield ''.join(encoder.encode(projection.render_row(row)) + '\n' for row in chunk)
+
+        return StreamingHttpResponse(stream_rows(), content_type=self.stream_content_type)
+
+    def iterate_chunks(self, rows, chunk_size):
+        """ values() rows of a queryset ordered by ``order_by_cursor``, each chunk read by its own
+        keyset query. no cursor stays open in between, so the connection is free for other
+        requests while a chunk is sent, as it is under ASGI
+        """
+        position_filter = Q()
+        while True:
+            chunk = list(rows.filter(position_filter)[:chunk_size])
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            position_filter = self.get_position_filter([chunk[-1][field] for field, _ in self.ordering])
+
+    # keyset pagination
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request) or self.max_page_size
+        queryset = self.order_by_cursor(queryset)
+
+        position, reverse = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position is not None:
+            # a tampered cursor can hold values the sort fields do not accept
+            try:
+                position = self.clean_position(queryset.model, position)
+                queryset = queryset.filter(self.get_position_filter(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        if reverse:
+            queryset = queryset.reverse()
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page_positions = [self.get_position(obj) for obj in (results[:1] + results[-1:])]
+        return results
+
+    def order_by_cursor(self, queryset):
+        self.ordering = self.get_cursor_ordering(queryset)
+        return queryset.order_by(*(f'-{field}' if desc else field for field, desc in self.ordering))
+
+    def get_cursor_ordering(self, queryset):
+        """ (field, descending) pairs from the queryset's ordering, always ending in
+        an ``id`` tiebreaker that follows the direction of the sort key
+        """
+        ordering = []
+        for field in queryset.query.order_by:
+            ordering.append((field.lstrip('-'), field.startswith('-')))
+        if not ordering or ordering[-1][0] not in ('id', 'pk'):
+            ordering.append(('id', ordering[0][1] if ordering else False))
+        return ordering
+
+    def get_position(self, obj):
+        position = []
+        for field, desc in self.ordering:
+            # pages of values() rows are dicts keyed by the lookups they were sorted on
+            value = obj[field] if isinstance(obj, dict) else attrgetter(field.replace('__', '.'))(obj)
+            position.append(value if isinstance(value, int) else str(value))
+        return position
+
+    def clean_position(self, model, position):
+        """ runs each value of a decoded position through ``to_python`` of the model
+        field it is sorted on. values of annotations are passed through as they are
+        """
+        cleaned = []
+        for (field, desc), value in zip(self.ordering, position):
+            model_field = self.get_model_field(model, field)
+            cleaned.append(value if model_field is None else model_field.to_python(value))
+        return cleaned
+
+    def get_model_field(self, model, lookup):
+        model_field = None
+        for name in lookup.split('__'):
+            if model is None:
+                return None
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            model = model_field.related_model
+        return model_field
+
+    def get_position_filter(self, position, reverse=False):
+        """ rows strictly after ``position`` in the ordering, or before it when ``reverse`` is set.
+        built as ``a > x OR (a = x AND id > y)`` so mixed sort directions still work
+        """
+        position_filter = Q()
+        equal_filter = Q()
+        for (field, desc), value in zip(self.ordering, position):
+            lookup = 'lt' if desc != reverse else 'gt'
+            position_filter |= equal_filter & Q(**{f'{field}__{lookup}': value})
+            equal_filter &= Q(**{field: value})
+        return position_filter
+
+    def encode_cursor(self, position, reverse=False):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        return urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position, reverse = payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_cursor_link(self, position, reverse=False):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def get_cursor_paginated_response(self, data):
+        links = []
+        if self.has_previous:
+            url = self.request.build_absolute_uri()
+            links.append('<{}>; rel="first"'.format(replace_query_param(url, self.cursor_query_param, '')))
+            if self.page_positions:
+                links.append('<{}>; rel="prev"'.format(self.get_cursor_link(self.page_positions[0], reverse=True)))
+        if self.has_next and self.page_positions:
+            links.append('<{}>; rel="next"'.format(self.get_cursor_link(self.page_positions[-1])))
+
+        headers = {'Link': ', '.join(links)} if links else {}
+
+        return Response(data, headers=headers)
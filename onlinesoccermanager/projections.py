@@ -0,0 +1,72 @@
+from django.utils.encoding import force_str
+from django.utils.functional import cached_property
+from django.utils.translation import get_language
+from django_countries.serializer_fields import CountryField
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from onlinesoccermanager.money import MoneySerializerField
+
+
+class ValuesProjection:
+    """ Renders rows the way ``serializer_class`` would, reading them with ``values()``
+    instead of building model instances and running the serializer field by field.
+
+    The serializer declaration stays the single description of the output: its
+    fields are turned once into (name, lookup, formatter) triples. Integer and char
+    fields are copied, decimals already stored at the field's scale are formatted
+    straight away and country names come from a table built per language. Any
+    other field falls back to its own ``to_representation``.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.country_names = {}
+
+    @cached_property
+    def fields(self):
+        fields = []
+        for name, field in self.serializer_class().fields.items():
+            fields.append((name, '__'.join(field.source_attrs), self.get_formatter(field)))
+        return fields
+
+    def get_formatter(self, field):
+        if isinstance(field, serializers.IntegerField):
+            return int
+        if isinstance(field, CountryField) and field.name_only:
+            return lambda code: self.get_country_names(field).get(code) or field.to_representation(code)
+        if isinstance(field, serializers.CharField):
+            return str
+        if isinstance(field, MoneySerializerField):
+            return field.to_representation
+        if isinstance(field, serializers.DecimalField) and not field.localize and \
+                getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+            exponent = -field.decimal_places
+
+            def format_decimal(value):
+                if value.as_tuple().exponent == exponent:
+                    return format(value, 'f')
+                return field.to_representation(value)
+            return format_decimal
+        return field.to_representation
+
+    def get_country_names(self, field):
+        language = get_language()
+        if language not in self.country_names:
+            self.country_names[language] = {code: force_str(name) for code, name in field.countries}
+        return self.country_names[language]
+
+    def values(self, queryset):
+        """ the columns the output is built from, plus the sort keys a cursor position is read from """
+        lookups = [lookup for _, lookup, _ in self.fields]
+        ordering = [field.lstrip('-') for field in queryset.query.order_by]
+        return queryset.values(*lookups, *(field for field in ordering if field not in lookups))
+
+    def render_row(self, row):
+        return {
+            name: None if row[lookup] is None else format_value(row[lookup])
+            for name, lookup, format_value in self.fields
+        }
+
+    def render(self, rows):
+        render_row = self.render_row
+        return [render_row(row) for row in rows]
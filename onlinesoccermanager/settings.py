@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     'rest_framework',
     'django_countries',
     'django_filters',
@@ -57,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'oscsettings.middleware.SettingsMemoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -125,8 +127,15 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'users.authentication.CustomJWTAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'onlinesoccermanager.pagination.LinkHeaderPagination',
+    'PAGE_SIZE': config('PAGE_SIZE', default=25, cast=int),
 }
 
+# rows read by each query when a list endpoint is streamed with ?stream=ndjson
+STREAM_CHUNK_SIZE = config('STREAM_CHUNK_SIZE', default=2000, cast=int)
+# /market/stats/ rollups keep hourly rows for this many days before compacting them into daily rows
+MARKET_STATS_HOURLY_DAYS = config('MARKET_STATS_HOURLY_DAYS', default=7, cast=int)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -145,6 +154,10 @@ USE_TZ = True
 
 JWT_VALIDITY_MINUTES = int(config('JWT_VALIDITY_MINUTES', 60))
 JWT_ALGORITHM = 'HS256'
+# authenticate from token claims without loading the user. revoked tokens are still rejected
+# once the cached token version expires, or right away when revoked through users.services.user_tokens_revoke
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=False, cast=bool)
+JWT_TOKEN_STATE_CACHE_SECONDS = config('JWT_TOKEN_STATE_CACHE_SECONDS', default=60, cast=int)
 
 
 # Static files (CSS, JavaScript, Images)
@@ -159,11 +172,55 @@ AUTH_USER_MODEL = 'users.User'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
+# build the squad of a new user in a celery task when the team pool is empty instead of during the registration request
+ASYNC_TEAM_PROVISIONING = config('ASYNC_TEAM_PROVISIONING', default=False, cast=bool)
+
+# a round of fixtures is played this often by celery beat, see league.matches
+MATCH_ROUND_SECONDS = config('MATCH_ROUND_SECONDS', default=86400.0, cast=float)
+
 # Celery
 CELERY_BROKER_URL = config('CELERY_BROKER_URL')
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    'replenish-team-pool': {
+        'task': 'league.tasks.replenish_team_pool',
+        'schedule': 300.0,
+    },
+    'compact-market-stats': {
+        'task': 'league.tasks.compact_market_stats',
+        'schedule': 3600.0,
+    },
+    'play-next-round': {
+        'task': 'league.tasks.play_next_round',
+        'schedule': MATCH_ROUND_SECONDS,
+    },
+}
 
 # JWT settings
-JWT_AUTH_HEADER_PREFIX = 'Bearer'
\ No newline at end of file
+JWT_AUTH_HEADER_PREFIX = 'Bearer'
+
+# Cache
+# shared by every daphne and celery process. it needs a redis database of its own, clearing it must not
+# flush the celery queues. tests run against a local memory cache, see onlinesoccermanager.test_runner
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_URL'),
+    }
+}
+TEST_RUNNER = 'onlinesoccermanager.test_runner.TestRunner'
+# list responses are cached this long at most, writes through league.services invalidate them earlier. 0 disables the cache
+RESPONSE_CACHE_SECONDS = config('RESPONSE_CACHE_SECONDS', default=60, cast=int)
+# transfer market events reach websocket subscribers in every ASGI worker through Redis pub/sub
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': [config('CHANNEL_LAYER_URL', default=CELERY_BROKER_URL)],
+        },
+    }
+}
+# how long a process trusts its in-memory copy of a settings model before checking its version in the shared cache
+SETTINGS_LOCAL_CACHE_SECONDS = config('SETTINGS_LOCAL_CACHE_SECONDS', default=5, cast=int)
@@ -0,0 +1,20 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests against a local memory cache, the way Django swaps in the locmem email backend,
+    so the cache.clear() calls of the tests never flush the shared Redis
+    """
+
+    def setup_test_environment(self, **kwargs) -> None:
+        super().setup_test_environment(**kwargs)
+        self.test_caches = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        })
+        self.test_caches.enable()
+
+    def teardown_test_environment(self, **kwargs) -> None:
+        self.test_caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,14 @@
+from oscsettings.models import settings_memo
+
+
+class SettingsMemoMiddleware:
+    """
+    reads each settings model at most once per request, however many rows the request creates
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with settings_memo():
+            return self.get_response(request)
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oscsettings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguesettings',
+            name='team_pool_low_water_mark',
+            field=models.PositiveIntegerField(default=20),
+        ),
+        migrations.AddField(
+            model_name='leaguesettings',
+            name='team_pool_size',
+            field=models.PositiveIntegerField(default=100),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:12
+
+from django.db import migrations
+import onlinesoccermanager.money
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oscsettings', '0002_team_pool'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                'ALTER TABLE oscsettings_leaguesettings '
+                'ALTER COLUMN initial_player_value TYPE bigint USING round(initial_player_value * 100)::bigint, '
+                'ALTER COLUMN initial_team_budget TYPE bigint USING round(initial_team_budget * 100)::bigint',
+                # a new version makes every process reload the settings instead of using a cached copy in units
+                'UPDATE oscsettings_leaguesettings SET updated_at = now()',
+            ],
+            reverse_sql=[
+                'ALTER TABLE oscsettings_leaguesettings '
+                'ALTER COLUMN initial_player_value TYPE numeric(65, 2) USING initial_player_value / 100.0, '
+                'ALTER COLUMN initial_team_budget TYPE numeric(65, 2) USING initial_team_budget / 100.0',
+                'UPDATE oscsettings_leaguesettings SET updated_at = now()',
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='leaguesettings',
+                    name='initial_player_value',
+                    field=onlinesoccermanager.money.MoneyField(default=100000000),
+                ),
+                migrations.AlterField(
+                    model_name='leaguesettings',
+                    name='initial_team_budget',
+                    field=onlinesoccermanager.money.MoneyField(default=500000000),
+                ),
+            ],
+        ),
+    ]
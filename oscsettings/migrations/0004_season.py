@@ -0,0 +1,23 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oscsettings', '0003_money_in_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguesettings',
+            name='season',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='leaguesettings',
+            name='season_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,10 +1,40 @@
 from __future__ import annotations
 
-from decimal import Decimal
-from typing import Any
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, NamedTuple, Optional
+from django.conf import settings
 from django.core.cache import cache
 from django.db import models
 from django_countries.fields import CountryField
+from onlinesoccermanager.money import CENTS, MoneyField
+
+
+class LocalCacheEntry(NamedTuple):
+    version: str
+    obj: Any
+    expires_at: float
+
+
+# process local copy of each settings model, checked against the version in the shared cache
+# at most every SETTINGS_LOCAL_CACHE_SECONDS
+local_cache: dict = {}
+# settings loaded during the current request, see settings_memo
+request_memo: ContextVar[Optional[dict]] = ContextVar('settings_request_memo', default=None)
+
+
+@contextmanager
+def settings_memo():
+    """
+    every load() inside the block returns the same settings objects, read at most once.
+    wrapped around each request by oscsettings.middleware.SettingsMemoMiddleware
+    """
+    token = request_memo.set({})
+    try:
+        yield
+    finally:
+        request_memo.reset(token)
 
 
 class AbstractSettingModel(models.Model):
@@ -16,24 +46,73 @@ class AbstractSettingModel(models.Model):
     def delete(self, *args, **kwargs):
         pass
 
+    @property
+    def cache_version(self) -> str:
+        return self.updated_at.isoformat()
+
+    @classmethod
+    def version_cache_key(cls) -> str:
+        return f'{cls.__name__}:version'
+
+    def set_local_cache(self):
+        expires_at = time.monotonic() + settings.SETTINGS_LOCAL_CACHE_SECONDS
+        local_cache[self.__class__.__name__] = LocalCacheEntry(self.cache_version, self, expires_at)
+
     def set_cache(self):
-        cache.set(self.__class__.__name__, self)
+        cache.set_many({self.__class__.__name__: self, self.version_cache_key(): self.cache_version})
+        self.set_local_cache()
+
+    @classmethod
+    def clear_cache(cls):
+        cache.delete_many([cls.__name__, cls.version_cache_key()])
+        local_cache.pop(cls.__name__, None)
 
     def save(self, *args: Any, **kwargs: Any) -> None:
         self.pk = 1
         super(AbstractSettingModel, self).save(*args, **kwargs)
+        # a new version in the shared cache makes every other process drop its local copy
         self.set_cache()
 
     @classmethod
     def load(cls) -> LeagueSettings:
-        if cache.get(cls.__name__) is None:
-            obj, created = cls.objects.get_or_create(pk=1)
-            if not created:
-                obj.set_cache()
-        return cache.get(cls.__name__)
+        memo = request_memo.get()
+        if memo is not None and cls.__name__ in memo:
+            return memo[cls.__name__]
+
+        obj = cls.load_cached()
+        if memo is not None:
+            memo[cls.__name__] = obj
+        return obj
+
+    @classmethod
+    def load_cached(cls) -> LeagueSettings:
+        entry = local_cache.get(cls.__name__)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry.obj
+
+        version = cache.get(cls.version_cache_key())
+        if version is not None and entry is not None and entry.version == version:
+            entry.obj.set_local_cache()
+            return entry.obj
+
+        obj = cache.get(cls.__name__) if version is not None else None
+        if obj is not None and obj.cache_version == version:
+            obj.set_local_cache()
+            return obj
+
+        obj, created = cls.objects.get_or_create(pk=1)
+        obj.set_cache()
+        return obj
 
 
 class LeagueSettings(AbstractSettingModel):
-    initial_player_value = models.DecimalField(max_digits=65, decimal_places=2, default=Decimal(1000000))
-    initial_team_budget = models.DecimalField(max_digits=65, decimal_places=2, default=Decimal(5000000))
+    initial_player_value = MoneyField(default=1000000 * CENTS)
+    initial_team_budget = MoneyField(default=5000000 * CENTS)
     default_country = CountryField(default='KE')
+    # unowned teams kept ready for registration, refilled up to team_pool_size once fewer than
+    # team_pool_low_water_mark are left
+    team_pool_size = models.PositiveIntegerField(default=100)
+    team_pool_low_water_mark = models.PositiveIntegerField(default=20)
+    # the season being played and when the rollover that started it ran, see league.season
+    season = models.PositiveIntegerField(default=1)
+    season_started_at = models.DateTimeField(null=True, blank=True)
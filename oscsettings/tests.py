@@ -1,3 +1,47 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from onlinesoccermanager.money import Money
+from oscsettings.models import LeagueSettings, local_cache, settings_memo
+
+
+@override_settings(SETTINGS_LOCAL_CACHE_SECONDS=60)
+class LeagueSettingsCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        LeagueSettings.clear_cache()
+
+    def tearDown(self) -> None:
+        LeagueSettings.clear_cache()
+        super().tearDown()
+
+    def test_load_is_served_from_local_cache(self) -> None:
+        league_settings = LeagueSettings.load()
+        with patch('oscsettings.models.cache') as cache_mock, self.assertNumQueries(0):
+            self.assertIs(LeagueSettings.load(), league_settings)
+        cache_mock.get.assert_not_called()
+
+    def test_save_in_another_process_invalidates_local_cache(self) -> None:
+        LeagueSettings.load()
+        stale_entry = local_cache[LeagueSettings.__name__]
+        other = LeagueSettings.objects.get(pk=1)
+        other.initial_player_value = Money.from_decimal(2000000)
+        other.save()
+
+        # the other process only updated the shared cache, this one still holds the old copy
+        local_cache[LeagueSettings.__name__] = stale_entry
+        self.assertEqual(LeagueSettings.load().initial_player_value, Money.from_decimal(1000000))
+        local_cache[LeagueSettings.__name__] = stale_entry._replace(expires_at=0)
+        with self.assertNumQueries(0):
+            self.assertEqual(LeagueSettings.load().initial_player_value, Money.from_decimal(2000000))
+
+    def test_settings_memo(self) -> None:
+        with settings_memo():
+            league_settings = LeagueSettings.load()
+            cache.clear()
+            local_cache.clear()
+            with self.assertNumQueries(0):
+                for _ in range(40):
+                    self.assertIs(LeagueSettings.load(), league_settings)
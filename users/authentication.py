@@ -3,17 +3,21 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from users.models import TokenUser
+from users.selectors import user_token_state
 
 
 class CustomJWTAuthentication(BaseAuthentication):
     '''
         custom authentication class for DRF and JWT
         https://github.com/encode/django-rest-framework/blob/master/rest_framework/authentication.py
+
+        with settings.JWT_STATELESS_AUTH the user is built from the token claims instead of being
+        loaded from the database. revocation is still honoured through the cached token version
     '''
 
     def authenticate(self, request):
 
-        User = get_user_model()
         authorization_header = request.headers.get('Authorization')
 
         if not authorization_header:
@@ -21,27 +25,49 @@ class CustomJWTAuthentication(BaseAuthentication):
         auth_header_list = authorization_header.split(' ')
         try:
             access_token = auth_header_list[1]
-            payload = jwt.decode(
-                access_token, settings.SECRET_KEY, algorithms=['HS256'])
+        except IndexError:
+            raise exceptions.AuthenticationFailed('Token prefix missing')
+        payload = self.decode_token(access_token)
+        if auth_header_list[0] != settings.JWT_AUTH_HEADER_PREFIX:
+            raise exceptions.AuthenticationFailed('Invalid token prefix')
+
+        return self.authenticate_payload(payload)
+
+    def authenticate_token(self, access_token):
+        ''' authenticates a bare token, for clients that cannot send headers such as websockets '''
+        return self.authenticate_payload(self.decode_token(access_token))
 
+    def decode_token(self, access_token):
+        try:
+            return jwt.decode(access_token, settings.SECRET_KEY, algorithms=['HS256'])
         except jwt.ExpiredSignatureError:
             raise exceptions.AuthenticationFailed('signature has expired')
         except jwt.DecodeError:
             raise exceptions.AuthenticationFailed('Error decoding signature')
         except jwt.InvalidTokenError:
             raise exceptions.AuthenticationFailed()
-        except IndexError:
-            raise exceptions.AuthenticationFailed('Token prefix missing')
-        if auth_header_list[0] != settings.JWT_AUTH_HEADER_PREFIX:
-            raise exceptions.AuthenticationFailed('Invalid token prefix')
 
-        user = User.objects.filter(id=payload['id']).first()
-        if user is None:
-            raise exceptions.AuthenticationFailed('User not found')
+    def authenticate_payload(self, payload):
+        User = get_user_model()
+        if settings.JWT_STATELESS_AUTH:
+            user = TokenUser.from_payload(payload)
+            token_state = user_token_state(user.id)
+            if token_state is None:
+                raise exceptions.AuthenticationFailed('User not found')
+            # staff status is taken from the database, a demoted user keeps the claim until the token expires
+            current_token_version, is_active, user.is_staff = token_state
+        else:
+            user = User.objects.filter(id=payload['id']).first()
+            if user is None:
+                raise exceptions.AuthenticationFailed('User not found')
+            current_token_version, is_active = user.token_version, user.is_active
 
-        if not user.is_active:
+        if not is_active or not user.is_active:
             raise exceptions.AuthenticationFailed('user is inactive')
 
+        if payload.get('ver', 0) != current_token_version:
+            raise exceptions.AuthenticationFailed('token has been revoked')
+
         return (user, None)
 
     def authenticate_header(self, request):
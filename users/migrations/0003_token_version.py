@@ -0,0 +1,33 @@
+# Generated by Django 4.0.5 on 2026-10-18 14:41
+
+from django.db import migrations, models
+import users.managers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_team_provisioning_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('users.user',),
+            managers=[
+                ('objects', users.managers.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
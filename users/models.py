@@ -1,6 +1,8 @@
 import jwt
+from typing import Any
 from datetime import datetime, timedelta
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
@@ -8,6 +10,7 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from users.constants import TeamProvisioningStatus
 from users.managers import UserManager
 
 
@@ -38,6 +41,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     last_login = models.DateTimeField(_('last login'), default=timezone.now)
     date_of_birth = models.DateField(null=True, blank=True)
     profile_completed = models.BooleanField(default=False)
+    # only set when the team is built in the background after registration
+    team_provisioning_status = models.CharField(
+        max_length=7, choices=TeamProvisioningStatus.choices, null=True, blank=True
+    )
+    # bumped to revoke every token issued so far, see users.services.user_tokens_revoke
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -64,10 +73,57 @@ class User(AbstractBaseUser, PermissionsMixin):
         expiry_date = datetime.now() + timedelta(minutes=valid_minutes)
         algorithm: str = getattr(settings, "JWT_ALGORITHM", 'HS256')
 
+        Team = apps.get_model('league', 'Team')
+        team = Team.objects.filter(owner=self).values_list('id', flat=True).first()
+
         token_payload = {
             'id': self.pk,
             'exp': int(expiry_date.strftime('%s')),
-            "email": self.email
+            "email": self.email,
+            'is_active': self.is_active,
+            'is_staff': self.is_staff,
+            'team_id': team,
+            'ver': self.token_version,
         }
 
         return jwt.encode(token_payload, settings.SECRET_KEY, algorithm=algorithm)
+
+
+class TokenUser(User):
+    """
+    User built from the claims of a JWT without touching the database, see
+    users.authentication.CustomJWTAuthentication. it only carries the claimed
+    fields so it can never be saved
+    """
+
+    team_id = None
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> 'TokenUser':
+        user = cls(
+            id=payload['id'],
+            email=payload.get('email', ''),
+            is_active=payload.get('is_active', True),
+            is_staff=payload.get('is_staff', False),
+            token_version=payload.get('ver', 0),
+        )
+        user._state.adding = False
+        user.team_id = payload.get('team_id')
+        # the provisioning status changes after the token is issued, it is loaded like a deferred field
+        # the first time it is read
+        del user.__dict__['team_provisioning_status']
+        return user
+
+    @property
+    def is_team_owner(self) -> bool:
+        # teams are never taken away from their owner, so only a missing claim needs a lookup
+        return self.team_id is not None or super().is_team_owner
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError('TokenUser is built from token claims and cannot be saved')
+
+    def delete(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError('TokenUser is built from token claims and cannot be deleted')
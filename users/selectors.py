@@ -1,3 +1,6 @@
+from typing import Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.exceptions import ValidationError
 from users.models import User
 
@@ -8,4 +11,26 @@ def user_retrieve_by_email(email: str):
     except User.DoesNotExist:
         raise ValidationError({"detail": "Invalid email. No account has the provided email"})
 
-    return user
\ No newline at end of file
+    return user
+
+
+def user_token_state_cache_key(user_id: int) -> str:
+    # v2 entries carry is_staff, the old pairs are left to expire
+    return f'user_token_state:v2:{user_id}'
+
+
+def user_token_state(user_id: int) -> Optional[Tuple[int, bool, bool]]:
+    """
+    (token_version, is_active, is_staff) of the user, cached for JWT_TOKEN_STATE_CACHE_SECONDS
+    and dropped whenever the user is saved. None when the user does not exist
+    """
+    cache_key = user_token_state_cache_key(user_id)
+    token_state = cache.get(cache_key)
+    if token_state is None:
+        token_state = User.objects.filter(id=user_id).values_list(
+            'token_version', 'is_active', 'is_staff'
+        ).first()
+        if token_state is None:
+            return None
+        cache.set(cache_key, tuple(token_state), settings.JWT_TOKEN_STATE_CACHE_SECONDS)
+    return tuple(token_state)
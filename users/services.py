@@ -1,11 +1,35 @@
+import logging
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import F
 
 from rest_framework.exceptions import ValidationError
 from typing import Optional
-from league.services import generate_team_with_players
-# from league.tasks import create_team_with_players_on_user_registration
+from league.services import generate_team_with_players, team_pool_claim, team_provisioning_fail
+from league.tasks import create_team_with_players_on_user_registration, replenish_team_pool
+from users.constants import TeamProvisioningStatus
 from users.models import User
+from users.selectors import user_token_state_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def task_enqueue_on_commit(task, *args, on_failure=None) -> None:
+    """
+    queues the task once the current transaction commits. the transaction is already committed by then,
+    so a broker outage is logged and handed to on_failure instead of failing the request
+    """
+    def enqueue():
+        try:
+            task.delay(*args)
+        except Exception:
+            logger.exception('could not queue %s for %r', task.name, args)
+            if on_failure is not None:
+                on_failure(*args)
+
+    transaction.on_commit(enqueue)
 
 
 @transaction.atomic
@@ -29,8 +53,16 @@ def user_create(
         last_name=last_name,
         password=password1
     )
-    generate_team_with_players(user)
-    # transaction.on_commit(lambda: create_team_with_players_on_user_registration.delay(user.id))
+    team = team_pool_claim(user)
+    if team is None and settings.ASYNC_TEAM_PROVISIONING:
+        user.team_provisioning_status = TeamProvisioningStatus.PENDING
+        user.save(update_fields=['team_provisioning_status'])
+        task_enqueue_on_commit(
+            create_team_with_players_on_user_registration, user.id, on_failure=team_provisioning_fail
+        )
+    elif team is None:
+        generate_team_with_players(user)
+    task_enqueue_on_commit(replenish_team_pool)
     return user
 
 
@@ -43,3 +75,13 @@ def user_login(email: str, password: str, request):
     if user is None:
         raise
     return user
+
+
+def user_tokens_revoke(user: User) -> None:
+    """
+    invalidates every token issued to the user so far. also call this after deactivating users through
+    a queryset update, which does not drop their cached token state like saving them does
+    """
+    User.objects.filter(id=user.id).update(token_version=F('token_version') + 1)
+    user.refresh_from_db(fields=['token_version'])
+    cache.delete(user_token_state_cache_key(user.id))
@@ -0,0 +1,11 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from users.models import User
+from users.selectors import user_token_state_cache_key
+
+
+@receiver(post_save, sender=User)
+def drop_cached_token_state(sender, instance: User, **kwargs):
+    # stateless authentication reads the new active and staff status on the next request
+    cache.delete(user_token_state_cache_key(instance.pk))
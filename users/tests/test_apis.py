@@ -1,7 +1,11 @@
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 
 from league.constants import PlayerPosition
+from league.tasks import create_team_with_players_on_user_registration, replenish_team_pool
+from users.constants import TeamProvisioningStatus
 
 User = get_user_model()
 
@@ -29,6 +33,85 @@ class UsersApiTestCase(TestCase):
         self.assertEqual(players.filter(position=PlayerPosition.MIDFIELDER).count(), 6)
         self.assertEqual(players.filter(position=PlayerPosition.ATTACKER).count(), 5)
 
+    @override_settings(ASYNC_TEAM_PROVISIONING=True)
+    def test_register_user_async_team_provisioning(self):
+        register_url = '/api/auth/registration/'
+        register_data = dict(
+            email='mary_sue@onlinesoccermanager.com',
+            password1='1326a12vr',
+            password2='1326a12vr'
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(register_url, data=register_data)
+        self.assertEqual(response.status_code, 201)
+        response_data = response.json()
+        self.assertEqual(response_data['team_provisioning_status'], TeamProvisioningStatus.PENDING)
+        self.assertEqual(len(callbacks), 2)
+        user = User.objects.get(id=response_data['id'])
+        self.assertFalse(user.is_team_owner)
+
+        status_url = '/api/league/my_team/status/'
+        auth_header = f'Bearer {user.token}'
+        response = self.client.get(status_url, HTTP_AUTHORIZATION=auth_header)
+        self.assertEqual(response.json(), {'status': TeamProvisioningStatus.PENDING, 'team': None})
+
+        # a redelivered task must not build a second team
+        create_team_with_players_on_user_registration(user.id)
+        create_team_with_players_on_user_registration(user.id)
+        user.refresh_from_db()
+        self.assertEqual(user.team_provisioning_status, TeamProvisioningStatus.READY)
+        self.assertEqual(user.team.players.count(), 20)
+        response = self.client.get(status_url, HTTP_AUTHORIZATION=auth_header)
+        self.assertEqual(response.json(), {'status': TeamProvisioningStatus.READY, 'team': user.team.id})
+
+    @override_settings(ASYNC_TEAM_PROVISIONING=True)
+    def test_register_user_async_team_provisioning_fails(self):
+        register_url = '/api/auth/registration/'
+        register_data = dict(
+            email='mary_sue@onlinesoccermanager.com',
+            password1='1326a12vr',
+            password2='1326a12vr'
+        )
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(register_url, data=register_data)
+        user = User.objects.get(id=response.json()['id'])
+        # not a database error, so the task gives up without retrying
+        with patch('league.tasks.team_provision', side_effect=ValueError), self.assertRaises(ValueError):
+            create_team_with_players_on_user_registration(user.id)
+        user.refresh_from_db()
+        self.assertEqual(user.team_provisioning_status, TeamProvisioningStatus.FAILED)
+
+    @override_settings(ASYNC_TEAM_PROVISIONING=True)
+    def test_register_user_async_team_provisioning_broker_down(self):
+        register_url = '/api/auth/registration/'
+        register_data = dict(
+            email='mary_sue@onlinesoccermanager.com',
+            password1='1326a12vr',
+            password2='1326a12vr'
+        )
+        with patch.object(create_team_with_players_on_user_registration, 'delay', side_effect=ConnectionError), \
+                patch.object(replenish_team_pool, 'delay'), \
+                self.assertLogs('users.services', level='ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(register_url, data=register_data)
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(id=response.json()['id'])
+        self.assertEqual(user.team_provisioning_status, TeamProvisioningStatus.FAILED)
+
+    def test_register_user_broker_down(self):
+        register_url = '/api/auth/registration/'
+        register_data = dict(
+            email='mary_sue@onlinesoccermanager.com',
+            password1='1326a12vr',
+            password2='1326a12vr'
+        )
+        with patch.object(replenish_team_pool, 'delay', side_effect=ConnectionError), \
+                self.assertLogs('users.services', level='ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(register_url, data=register_data)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(id=response.json()['id']).is_team_owner)
+
     def test_register_user_non_matching_passwords(self):
         register_url = '/api/auth/registration/'
         email = 'jane_doe@onlinesoccermanager.com'
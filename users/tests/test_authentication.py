@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from league.services import generate_team_with_players
+from users.constants import TeamProvisioningStatus
+from users.models import TokenUser
+from users.services import user_tokens_revoke
+
+User = get_user_model()
+
+
+class JWTAuthenticationTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='johndoe@onlinesoccermanager.com',
+            first_name='John',
+            last_name='Doe',
+            password='barbarfoo'
+        )
+        generate_team_with_players(self.user)
+        self.status_url = '/api/league/my_team/status/'
+        self.auth_header = f'Bearer {self.user.token}'
+
+    def test_revoked_token(self) -> None:
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        user_tokens_revoke(self.user)
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=f'Bearer {self.user.token}')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_authentication_skips_user_lookup(self) -> None:
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        # the token state is cached now, only the team lookup of the view is left
+        with self.assertNumQueries(1):
+            response = self.client.get(self.status_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.json()['team'], self.user.team.id)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_authentication_revoked_token(self) -> None:
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        user_tokens_revoke(self.user)
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_authentication_inactive_user(self) -> None:
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=f'Bearer {self.user.token}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_user_is_read_only(self) -> None:
+        token_user = TokenUser.from_payload({'id': self.user.id, 'email': self.user.email, 'team_id': None})
+        with self.assertRaises(TypeError):
+            token_user.save()
+        with self.assertRaises(TypeError):
+            token_user.delete()
+        self.assertTrue(User.objects.filter(id=self.user.id).exists())
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_authentication_provisioning_status(self) -> None:
+        user = User.objects.create_user(
+            email='mary_sue@onlinesoccermanager.com', team_provisioning_status=TeamProvisioningStatus.PENDING
+        )
+        auth_header = f'Bearer {user.token}'
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=auth_header)
+        self.assertEqual(response.json(), {'status': TeamProvisioningStatus.PENDING, 'team': None})
+        User.objects.filter(pk=user.pk).update(team_provisioning_status=TeamProvisioningStatus.FAILED)
+        response = self.client.get(self.status_url, HTTP_AUTHORIZATION=auth_header)
+        self.assertEqual(response.json(), {'status': TeamProvisioningStatus.FAILED, 'team': None})
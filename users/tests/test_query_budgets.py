@@ -0,0 +1,30 @@
+from league.services import generate_team_with_players
+from league.tests.test_query_budgets import QueryBudgetTestCase
+
+
+class UsersQueryBudgetApiTestCase(QueryBudgetTestCase):
+    register_data = dict(
+        email='mary_sue@onlinesoccermanager.com',
+        password1='1326a12vr',
+        password2='1326a12vr'
+    )
+
+    def test_register_user_from_team_pool(self) -> None:
+        generate_team_with_players(None)
+        # includes unhiding the claimed team's players
+        with self.assertMaxQueries(7):
+            response = self.client.post('/api/auth/registration/', data=self.register_data)
+        self.assertEqual(response.status_code, 201)
+
+    def test_register_user_with_empty_team_pool(self) -> None:
+        with self.assertMaxQueries(11):
+            response = self.client.post('/api/auth/registration/', data=self.register_data)
+        self.assertEqual(response.status_code, 201)
+
+    def test_user_login(self) -> None:
+        self.user.set_password('foobarfoo')
+        self.user.save()
+        login_data = dict(email=self.user.email, password='foobarfoo')
+        with self.assertMaxQueries(3):
+            response = self.client.post('/api/auth/login/', data=login_data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
@@ -23,6 +23,7 @@ class RegisterUserView(APIView):
         email = serializers.EmailField()
         first_name = serializers.CharField(allow_null=True)
         last_name = serializers.CharField(allow_null=True)
+        team_provisioning_status = serializers.CharField(allow_null=True)
 
     def post(self, request):
         user_registration_serializer = self.InputSerializer(data=request.data)